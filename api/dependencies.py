@@ -7,6 +7,9 @@ from typing import Annotated
 from fastapi import Form, UploadFile, File, HTTPException, status
 from rpa_config import settings
 from api.schemas import BusinessContext, parse_context_from_form
+from robot.constants import PDF_MAGIC
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 async def validate_pdf_file(file: UploadFile) -> bytes:
@@ -29,23 +32,33 @@ async def validate_pdf_file(file: UploadFile) -> bytes:
             detail=f"Invalid content type. Expected: {settings.ALLOWED_CONTENT_TYPES}"
         )
     
-    # Read file
-    content = await file.read()
-    
-    # Check size
-    if len(content) > settings.max_upload_size_bytes:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Max size: {settings.API_MAX_UPLOAD_SIZE_MB}MB"
-        )
+    # Read file in chunks: memory is bounded by the size limit plus one chunk
+    chunks = []
+    total = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        # PDF magic number check (first chunk only), same signature the orchestrator enforces
+        if not chunks and not chunk.startswith(PDF_MAGIC):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Invalid PDF file format"
+            )
+        
+        # Check size
+        total += len(chunk)
+        if total > settings.max_upload_size_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Max size: {settings.API_MAX_UPLOAD_SIZE_MB}MB"
+            )
+        chunks.append(chunk)
     
-    # Basic PDF magic number check
-    if not content.startswith(b'%PDF'):
+    if not chunks:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Invalid PDF file format"
         )
     
+    content = b"".join(chunks)
     return content
 
 
@@ -2,10 +2,14 @@
 Pydantic schemas for API contracts.
 Separates business context from transport layer.
 """
+import re
 from typing import Optional, Literal, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
-import json
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+# Unicode word characters or dash, with at least one alphanumeric character
+# (same as str.isalnum() once '-' and '_' are dropped, so accented tenants are valid)
+_TENANT_ID_RE = re.compile(r'[\w-]*[^\W_][\w-]*')
 
 
 class BusinessContext(BaseModel):
@@ -28,7 +32,7 @@ class BusinessContext(BaseModel):
     @classmethod
     def validate_tenant_id(cls, v: str) -> str:
         """Ensure tenant_id contains only safe characters."""
-        if not v.replace("-", "").replace("_", "").isalnum():
+        if not _TENANT_ID_RE.fullmatch(v):
             raise ValueError("tenant_id must contain only alphanumeric, dash, or underscore")
         return v
 
@@ -97,9 +101,9 @@ def parse_context_from_form(context_str: str) -> BusinessContext:
         ValueError: If JSON is invalid or validation fails
     """
     try:
-        context_dict = json.loads(context_str)
-        return BusinessContext(**context_dict)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Invalid JSON in context field: {e}")
-    except Exception as e:
+        # Fused JSON decode + validation inside pydantic-core (no intermediate dict)
+        return BusinessContext.model_validate_json(context_str)
+    except ValidationError as e:
+        if any(err["type"] == "json_invalid" for err in e.errors()):
+            raise ValueError(f"Invalid JSON in context field: {e}")
         raise ValueError(f"Context validation failed: {e}")
@@ -1,18 +1,35 @@
-import pandas as pd
+import csv
 import os
 import logging
+import threading
 from flask import Flask, request, jsonify
 from src.extract_data import extract_block_data
 
 
 logging.basicConfig(
     filename='app.log', 
-    level=logging.info ,
+    level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
 app = Flask(__name__)
 
+OUTPUT_PATH = os.path.join('output', 'documentacao_AP.xlsx')
+
+# Lock: requests concorrentes não intercalam linhas no mesmo arquivo
+_csv_lock = threading.Lock()
+
+def append_row(data: dict) -> None:
+    # Mesma semântica de df.to_csv(mode='a'): colunas na ordem das chaves da própria linha e
+    # cabeçalho só em arquivo novo. fieldnames vem da linha, então chave nova nunca levanta erro
+    with _csv_lock:
+        os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+        with open(OUTPUT_PATH, 'a', newline='', encoding='utf-8') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(data))
+            if csv_file.tell() == 0:
+                writer.writeheader()
+            writer.writerow(data)
+
 @app.route('/upload_pdf' , methods=['POST'])  #client HTTP
 def upload_invoice():
     try:
@@ -22,12 +39,9 @@ def upload_invoice():
             return jsonify({'error' : 'Nenhum arquivo enviado'}), 400
         
         data = extract_block_data(file)
-        logging.info(f"Dados extraídos:{data}")
+        logging.info("Dados extraídos: %s", data)
 
-        output_path = os.path.join('output', 'documentacao_AP.xlsx')
-        df = pd.DataFrame([data])
-        header = not os.path.exists(output_path)
-        df.to_csv(output_path, index=False, mode='a', header=header)
+        append_row(data)
 
         return jsonify({'message' : 'Dados extraídos e salvos com sucesso', 'dados':data }), 200
     
@@ -0,0 +1,6 @@
+"""
+Constantes compartilhadas entre o robot e a API, sem dependências pesadas (ex: fitz).
+"""
+
+# Assinatura de arquivo PDF: exigida pelo Orchestrator e pela validação de upload da API
+PDF_MAGIC = b"%PDF-"
@@ -1,4 +1,7 @@
+import logging
 import re
+import unicodedata
+from bisect import bisect_right
 from typing import List, Optional, Dict, Any
 
 from ..schema.models import InvoiceExtractionResult, Item, Party, Financials
@@ -6,28 +9,86 @@ from .validators import(
     cnpj_validator, 
     nfe_key_validator, 
     monetari_value_validator,
-    validator_valor_fiscal_brasileiro
+    validator_valor_fiscal_brasileiro,
+    _only_digits
 )
 
-CNPJ_PATTERN = r'\b\d{2}\.?\d{3}\.?\d{3}/?\.?\d{4}-?\d{2}\b'
+logger = logging.getLogger(__name__)
+
+# Separadores possessivos (?+): um separador presente nunca é devolvido ao backtracking
+CNPJ_PATTERN = r'\b\d{2}\.?+\d{3}\.?+\d{3}/?+\.?+\d{4}-?+\d{2}\b'
 KEY_PATTERN = r'\b\d{44}\b'  # nfe key de 44 dígitos
 VALUE_PATTERN = r'R?\$?\s*([\d]{1,3}(?:[.,]\d{3})*(?:[.,]\d{2}))'
 
-import unicodedata
+# Padrões compilados uma única vez no import (evita lookup no cache do `re` por chamada)
+# Modo Unicode de propósito: com re.ASCII, \b passa a casar junto de letras acentuadas
+# ("Nº04.252.011/0001-10") e \d deixa de casar dígitos não ASCII
+_CNPJ_RE = re.compile(CNPJ_PATTERN)
+_KEY_RE = re.compile(KEY_PATTERN)
+_VALUE_RE = re.compile(VALUE_PATTERN)
+_CNPJ_PUNCT_TABLE = str.maketrans('', '', './-')  # separadores aceitos por CNPJ_PATTERN
+
+# "DATA DE EMISSÃO ... dd/mm/aaaa" já é coberto pelo primeiro padrão (mesma âncora EMISSÃO),
+# assim como "COMPETÊNCIA ... dd/mm/aaaa" casa antes como mm/aaaa: não há variantes redundantes
+_EMISSION_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'EMISS[AÃ]O.*?(\d{2}/\d{2}/\d{4}(?:\s*\d{2}:\d{2}:\d{2})?)',
+))
+_DATE_FALLBACK_RE = re.compile(r'\b(\d{2}/\d{2}/\d{4})\b')
+
+_COMPETENCE_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'COMPET[EÊ]NCIA.*?(\d{2}/\d{4})',
+    r'COMPET[EÊ]NCIA.*?(\d{2}-\d{4})',
+))
+
+# Marcadores de início de bloco (ver extract_blocks)
+_BLOCK_MARKERS = {
+    "ISSUER": [r'PRESTADOR\s+(?:DO|DE)?\s*SERVI[CÇ]O', r'DADOS\s+DO\s+PRESTADOR', r'EMITENTE'],
+    "RECIPIENT": [r'TOMADOR\s+(?:DO|DE)?\s*SERVI[CÇ]O', r'DADOS\s+DO\s+TOMADOR', r'DESTINAT[AÁ]RIO'],
+    "ITEMS": [r'DISCRIMINA[CÇ][AÃ]O\s+(?:DOS|DE)?\s*(?:SERVI[CÇ]OS|PRODUTOS)', r'DESCRI[CÇ][AÃ]O\s+DOS\s+SERVI[CÇ]OS'],
+    "FINANCIALS": [r'VALOR\s+TOTAL', r'TOTAL\s+GERAL', r'TRIBUTA[CÇ][AÃ]O', r'TOTAL\s+DO\s+SERVI[CÇ]O']
+}
+# Alternação única com grupos nomeados (ex: ISSUER_0): uma só varredura do texto
+_BLOCK_RE = re.compile(
+    "|".join(
+        f"(?P<{block_type}_{i}>{pat})"
+        for block_type, patterns in _BLOCK_MARKERS.items()
+        for i, pat in enumerate(patterns)
+    ),
+    re.IGNORECASE
+)
+
+_TOTAL_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'TOTAL\s+GERAL\s*:?\s*R?\$?\s*([\d\.,]+)',
+    r'VALOR\s+L[IÍ]QUIDO\s*:?\s*R?\$?\s*([\d\.,]+)',
+    r'VALOR\s+TOTAL\s*:?\s*R?\$?\s*([\d\.,]+)',
+    r'TOTAL\s*:?\s*R?\$?\s*([\d\.,]+)',
+    r'R\$\s*([\d\.,]+)' # Match agressivo no final do bloco financeiro
+))
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[\.\-\,]+$')
+_CURRENCY_PREFIX_RE = re.compile(r'R\$\s*')
+
+# Linhas de metadados ignoradas no bloco de itens (uma busca em vez de N substrings)
+_ITEM_SKIP_RE = re.compile(r'TOTAL|VALOR|DATA|COMPETÊNCIA|DISCRIMINA', re.IGNORECASE)
+
+_SURROGATE_RE = re.compile('[\ud800-\udfff]')
+
+# Tabela de remoção dos diacríticos combinantes (U+0300..U+036F) usados no português
+_COMBINING_TABLE = dict.fromkeys(range(0x300, 0x370))
 
 def remove_accents(input_str):
     nfkd_form = unicodedata.normalize('NFKD', input_str)
-    return "".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    return nfkd_form.translate(_COMBINING_TABLE)
 
-INVALID_NAME_TOKENS = {
-    "DO", "DE", "DA", "DOS", "DAS", "SERVICO", "SERVICOS", "PRODUTO", "PRODUTOS",
+INVALID_NAME_TOKENS: frozenset[str] = frozenset({
     "DO", "DE", "DA", "DOS", "DAS", "SERVICO", "SERVICOS", "PRODUTO", "PRODUTOS",
     "PRESTADOR", "TOMADOR", "EMITENTE", "DESTINATARIO",
     "CNPJ", "CPF", "DADOS", "MUNICIPAL", "SECRETARIA", "FAZENDA", "PREFEITURA",
     "NOTA", "FISCAL", "ELETRONICA", "NFSE", "NFE", "NFS-E",
     "NOME", "RAZAO", "SOCIAL", "ENDERECO", "MUNICIPIO", "UF",
     "EMPRESARIAL", "NIF", "INSCRICAO", "ESTADUAL"
-}
+})
 
 def clean_party_name(name: str) -> Optional[str]:
     """
@@ -41,21 +102,21 @@ def clean_party_name(name: str) -> Optional[str]:
         return None
     
     # Remove espaços multiplos e quebras
-    name = re.sub(r'\s+', ' ', name)
+    name = _WHITESPACE_RE.sub(' ', name)
     
     # Uppercase para padronização
     name = name.upper().strip()
     
     # Remove hífens ou pontos soltos no final (resíduo comum de OCR)
-    name = re.sub(r'[\.\-\,]+$', '', name)
+    name = _TRAILING_PUNCT_RE.sub('', name)
     
     name = name.strip()
     if not name:
         return None
 
     # Validação Semântica: Rejeita labels genéricos
-    # Normaliza para comparação (remove acentos)
-    name_normalized = remove_accents(name)
+    # Normaliza para comparação (remove acentos); nomes ASCII dispensam o NFKD
+    name_normalized = name if name.isascii() else remove_accents(name)
     
     # Se todas as palavras significativas do nome estão na lista proibida, descarta
     tokens = [t for t in name_normalized.split() if len(t) > 2] # Ignora 'DA', 'DE', 'O' curtos
@@ -71,26 +132,40 @@ def clean_party_name(name: str) -> Optional[str]:
 
 def normalizer_unicode(text: str) -> str:
     try:
+        # Só surrogates isolados não sobrevivem ao round-trip UTF-8: sem eles, o texto já está ok
+        if text.isascii() or _SURROGATE_RE.search(text) is None:
+            return text
         return text.encode('utf-8', 'ignore').decode('utf-8', 'ignore')
-    except:
+    except (UnicodeError, AttributeError):
         return text
 
 def find_key_valid_access(text: str) -> Optional[Dict[str, Any]]:
     # Chave pode estar em qualquer lugar (cabeçalho, rodapé)
-    extrations = re.findall(KEY_PATTERN, text)
+    extrations = _KEY_RE.findall(text)
     for extration in extrations:
         validation = nfe_key_validator(extration)
         if validation["valido"]:
             return validation
     return None
 
-def find_cnpjs(text: str) -> List[Dict[str, Any]]:
-    extrations = re.findall(CNPJ_PATTERN, text)
+def find_cnpjs(text: str, with_spans: bool = False) -> List[Any]:
+    """
+    Retorna as validações dos CNPJs válidos encontrados no texto, sem repetição.
+    Com with_spans=True, cada ocorrência vira uma tupla (inicio, fim, validacao);
+    repetições do mesmo CNPJ reaproveitam a validação da primeira ocorrência.
+    """
     cnpjs_valid = []
-    for extration in extrations:
-        validation = cnpj_validator(extration)
+    seen: Dict[str, Dict[str, Any]] = {}
+    for m in _CNPJ_RE.finditer(text):
+        digits = m.group(0).translate(_CNPJ_PUNCT_TABLE)
+        validation = seen.get(digits)
+        if validation is None:
+            # Valida pelos dígitos: formas com e sem máscara compartilham a entrada do cache
+            validation = seen[digits] = cnpj_validator(digits)
+        elif not with_spans:
+            continue
         if validation["valido"]:
-            cnpjs_valid.append(validation)
+            cnpjs_valid.append((m.start(), m.end(), validation) if with_spans else validation)
     return cnpjs_valid
 
 def extract_emission_and_competence(text: str) -> tuple:
@@ -99,28 +174,17 @@ def extract_emission_and_competence(text: str) -> tuple:
     emission = None
     competence = None
 
-    pattern_emission = [
-        r'EMISS[AÃ]O.*?(\d{2}/\d{2}/\d{4}(?:\s*\d{2}:\d{2}:\d{2})?)',
-        r'DATA\s+DE\s+EMISS[AÃ]O.*?(\d{2}/\d{2}/\d{4})',    
-    ]
-
-    for pattern in pattern_emission:
-        m = re.search(pattern, text, re.IGNORECASE)
+    for pattern in _EMISSION_RES:
+        m = pattern.search(text)
         if m:
             emission = m.group(1)
             break
     if not emission:
-        m = re.search(r'\b(\d{2}/\d{2}/\d{4})\b', text)
+        m = _DATE_FALLBACK_RE.search(text)
         emission = m.group(1) if m else None
-    
-    pattern_competence = [
-        r'COMPET[EÊ]NCIA.*?(\d{2}/\d{4})',
-        r'COMPET[EÊ]NCIA.*?(\d{2}/\d{2}/\d{4})',
-        r'COMPET[EÊ]NCIA.*?(\d{2}-\d{4})'
-    ]
-
-    for pattern in pattern_competence:
-        m = re.search(pattern, text, re.IGNORECASE)
+
+    for pattern in _COMPETENCE_RES:
+        m = pattern.search(text)
         if m:
             competence = m.group(1)
             break
@@ -135,77 +199,47 @@ def extract_blocks(text: str) -> Dict[str, str]:
     """
     Fatia o texto em blocos semânticos baseados em headers conhecidos.
     Estratégia:
-    1. Encontrar posições de inicio de cada seção conhecida.
-    2. Ordenar cabeçalhos por posição.
-    3. Fatiar texto entre header_atual e proximo_header.
+    1. Encontrar posições de inicio de cada seção conhecida (já em ordem, varredura única).
+    2. Fatiar texto entre header_atual e proximo_header.
     """
     
-    # Definição de marcadores de início de bloco
-    markers = {
-        "ISSUER": [r'PRESTADOR\s+(?:DO|DE)?\s*SERVI[CÇ]O', r'DADOS\s+DO\s+PRESTADOR', r'EMITENTE'],
-        "RECIPIENT": [r'TOMADOR\s+(?:DO|DE)?\s*SERVI[CÇ]O', r'DADOS\s+DO\s+TOMADOR', r'DESTINAT[AÁ]RIO'],
-        "ITEMS": [r'DISCRIMINA[CÇ][AÃ]O\s+(?:DOS|DE)?\s*(?:SERVI[CÇ]OS|PRODUTOS)', r'DESCRI[CÇ][AÃ]O\s+DOS\s+SERVI[CÇ]OS'],
-        "FINANCIALS": [r'VALOR\s+TOTAL', r'TOTAL\s+GERAL', r'TRIBUTA[CÇ][AÃ]O', r'TOTAL\s+DO\s+SERVI[CÇ]O']
-    }
-    
-    # Encontrar todas as ocorrências
-    found_headers = [] # (pos, type, match_text)
+    # Encontrar todas as ocorrências; finditer já devolve em ordem de posição
+    found_headers = [] # (pos, type)
     
-    for block_type, patterns in markers.items():
-        for pat in patterns:
-            # Usa finditer para pegar todas ocorrências
-            for m in re.finditer(pat, text, re.IGNORECASE):
-                found_headers.append((m.start(), block_type))
+    # Varredura única: o grupo que casou (m.lastgroup) identifica o tipo do bloco
+    for m in _BLOCK_RE.finditer(text):
+        block_type = m.lastgroup.rsplit("_", 1)[0]
+        found_headers.append((m.start(), block_type))
     
-    # Ordena por posição no texto
-    found_headers.sort(key=lambda x: x[0])
-    
-    blocks = {
-        "ISSUER": "",
-        "RECIPIENT": "",
-        "ITEMS": "",
-        "FINANCIALS": "",
-        "HEADER": "" # O que vem antes do primeiro bloco conhecido
+    # Partes de cada bloco, unidas no final (evita crescer string com +=)
+    parts: Dict[str, List[str]] = {
+        "ISSUER": [],
+        "RECIPIENT": [],
+        "ITEMS": [],
+        "FINANCIALS": [],
+        "HEADER": [] # O que vem antes do primeiro bloco conhecido
     }
     
     # Se não achou nada, retorna tudo vazio (ou tudo como HEADER/UNKNOWN)
     if not found_headers:
-        blocks["HEADER"] = text
-        return blocks
+        parts["HEADER"].append(text)
+        return {k: "\n".join(v) for k, v in parts.items()}
     
     # O que vem antes do primeiro header é Header/Metadados gerais
     first_pos = found_headers[0][0]
-    blocks["HEADER"] = text[:first_pos]
+    parts["HEADER"].append(text[:first_pos])
     
-    total_len = len(text)
+    # O fim de cada bloco é o inicio do próximo header, ou fim do texto
+    end_positions = [pos for pos, _ in found_headers[1:]]
+    end_positions.append(len(text))
     
-    for i, (start_pos, block_type) in enumerate(found_headers):
-        # O fim deste bloco é o inicio do próximo header, ou fim do texto
-        if i + 1 < len(found_headers):
-            end_pos = found_headers[i+1][0]
-        else:
-            end_pos = total_len
-            
-        # Extrai conteúdo (incluindo ou não o próprio header? Vamos incluir para contexto regex se precisar, 
-        # mas idealmente o regex interno deve ignorar o header. Vamos incluir.)
-        # Mas para "extract_name", ter o header "PRESTADOR" atrapalha? 
-        # Sim, atrapalha se pegarmos a linha 0. MELHOR: Pular o tamanho do match?
-        # A lógica antiga usava regex que consumia o header. Vamos passar o bloco todo.
-        
-        content = text[start_pos:end_pos]
-        
-        # Concatena se houver múltiplos blocos do mesmo tipo (raro mas possível, ex: itens quebrados)
-        # Para Prestador/Tomador, geralmente só vale o primeiro, mas vamos concatenar por segurança
-        # ou melhor: manter o PRIMEIRO bloco achado de cada tipo costuma ser o principal.
-        # SE já tem conteudo, talvez seja melhor não sujar.
-        # No caso do usuário: "EMITENTE DA NFS-e" apareceu depois.
-        # Vamos concatenar com quebra de linha.
-        if blocks[block_type]:
-            blocks[block_type] += "\n" + content
-        else:
-            blocks[block_type] = content
-
-    return blocks
+    for (start_pos, block_type), end_pos in zip(found_headers, end_positions):
+        # Extrai conteúdo incluindo o próprio header (os extratores de bloco já o ignoram).
+        # Múltiplos blocos do mesmo tipo (ex: "EMITENTE DA NFS-e" aparecendo depois)
+        # são concatenados com quebra de linha.
+        parts[block_type].append(text[start_pos:end_pos])
+
+    return {k: "\n".join(v) for k, v in parts.items()}
 
 # ==============================================================================
 #  BLOCK-BASED EXTRACTORS
@@ -219,22 +253,34 @@ def extract_party_from_block(block_text: str) -> Optional[Party]:
     if not block_text or not block_text.strip():
         return None
         
-    lines = [l.strip() for l in block_text.splitlines() if l.strip()]
+    raw_lines = block_text.splitlines(keepends=True)
+    line_starts = []
+    pos = 0
+    for raw in raw_lines:
+        line_starts.append(pos)
+        pos += len(raw)
+
+    lines = [(i, l.strip()) for i, l in enumerate(raw_lines) if l.strip()]
     if not lines:
         return None
         
     # Busca CNPJ primeiro para ter certeza da entidade
-    valid_cnpjs = find_cnpjs(block_text)
-    cnpj = valid_cnpjs[0]["cnpj_formatado"] if valid_cnpjs else None
+    valid_cnpjs = find_cnpjs(block_text, with_spans=True)
+    cnpj = valid_cnpjs[0][2]["cnpj_formatado"] if valid_cnpjs else None
+
+    # Linhas que contêm um CNPJ válido (offset do match -> índice da linha)
+    cnpj_lines = {bisect_right(line_starts, start) - 1 for start, _, _ in valid_cnpjs}
     
     # Nome: Tenta heurística posicional
     # Linhas iniciais costumam ser o Header (PRESTADOR DE SERVIÇO)
     # Devemos pular linhas que são headers
     
     candidate_name = None
-    for line in lines:
-        # Se a linha for apenas um CNPJ, ignora (já foi capturado ou é metadado)
-        if cnpj_validator(line)["valido"]:
+    for i, line in lines:
+        # Se a linha for apenas um CNPJ (todos os seus dígitos formam um CNPJ válido), ignora.
+        # Fast path: com 14 dígitos e um match válido na linha, os dígitos são os do match
+        digits = _only_digits(line)
+        if len(digits) == 14 and (i in cnpj_lines or cnpj_validator(digits)["valido"]):
             continue
             
         cleaned = clean_party_name(line)
@@ -258,22 +304,29 @@ def extract_items_from_block(block_text: str) -> List[Item]:
             continue
             
         # Filtros de metadados ainda úteis
-        upper_ln = linha.upper()
-        if any(token in upper_ln for token in ["TOTAL", "VALOR", "DATA", "COMPETÊNCIA", "DISCRIMINA"]):
+        if _ITEM_SKIP_RE.search(linha):
             continue
 
-        valores = re.findall(VALUE_PATTERN, linha)
+        # Passada única: valida cada valor e guarda o span dos aceitos
         valores_validos = []
-        for valor in valores:
+        spans_validos = []
+        for m in _VALUE_RE.finditer(linha):
+            valor = m.group(1)
             validacao = monetari_value_validator(valor, fiscal_context=True)
             if validacao["valido"]:
                 valores_validos.append(valor)
+                spans_validos.append(m.span(1))
         
         if valores_validos:
-            descricao = linha
-            for valor in valores_validos:
-                descricao = descricao.replace(valor, '').strip()
-            descricao = re.sub(r'R\$\s*', '', descricao).strip()
+            # Descrição = trechos da linha fora dos valores aceitos
+            pieces = []
+            cursor = 0
+            for start, end in spans_validos:
+                pieces.append(linha[cursor:start])
+                cursor = end
+            pieces.append(linha[cursor:])
+            descricao = "".join(pieces).strip()
+            descricao = _CURRENCY_PREFIX_RE.sub('', descricao).strip()
             
             # Se sobrou nada de descrição, provavlmente era só uma linha de valores (subtotal?)
             if not descricao:
@@ -284,13 +337,11 @@ def extract_items_from_block(block_text: str) -> List[Item]:
                 unit_value=valores_validos[-1],
                 raw=linha
             ))
-            # DEBUG
-            print(f"DEBUG ITEM: Desc='{descricao}' Val='{valores_validos[-1]}'")
+            logger.debug("ITEM: Desc=%r Val=%r", descricao, valores_validos[-1])
         elif len(linha) > 15:
             # Descrição sem valor (continuação)
             items.append(Item(description=linha, raw=linha))
-            # DEBUG
-            print(f"DEBUG ITEM CONT: '{linha}'")
+            logger.debug("ITEM CONT: %r", linha)
             
     return items
 
@@ -301,16 +352,8 @@ def extract_total_from_block(block_text: str) -> Optional[str]:
     if not block_text:
         return None
         
-    patterns = [
-        r'TOTAL\s+GERAL\s*:?\s*R?\$?\s*([\d\.,]+)',
-        r'VALOR\s+L[IÍ]QUIDO\s*:?\s*R?\$?\s*([\d\.,]+)',
-        r'VALOR\s+TOTAL\s*:?\s*R?\$?\s*([\d\.,]+)',
-        r'TOTAL\s*:?\s*R?\$?\s*([\d\.,]+)', 
-        r'R\$\s*([\d\.,]+)' # Match agressivo no final do bloco financeiro
-    ]
-    
-    for pattern in patterns:
-        m = re.search(pattern, block_text, re.IGNORECASE)
+    for pattern in _TOTAL_RES:
+        m = pattern.search(block_text)
         if m:
             candidato = m.group(1)
             validacao = monetari_value_validator(candidato, fiscal_context=True)
@@ -330,34 +373,40 @@ def extract_from_text(text: str, source_filename: Optional[str] = None) -> Invoi
     # 2. Extração Scoped (com proteção try/except)
     try:
         emission, competence = extract_emission_and_competence(text) # Global scan ok for dates
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "dates", exc_info=exc)
         emission, competence = None, None
         
     try:
         chave_validada = find_key_valid_access(text) # Global scan ok for Key
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "access_key", exc_info=exc)
         chave_validada = None
         
     try:
         # Extrai do bloco especifico
         issuer = extract_party_from_block(blocks["ISSUER"])
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "issuer", exc_info=exc)
         issuer = None
         
     try:
         recipient = extract_party_from_block(blocks["RECIPIENT"])
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "recipient", exc_info=exc)
         recipient = None
         
     try:
         # Tenta bloco financeiro, fallback para itens se vazio (alguns layouts misturam)
         total = extract_total_from_block(blocks["FINANCIALS"])
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "total", exc_info=exc)
         total = None
         
     try:
         items = extract_items_from_block(blocks["ITEMS"])
-    except:
+    except Exception as exc:
+        logger.warning("extract_from_text: etapa %s falhou", "items", exc_info=exc)
         items = []
 
     financials = Financials(
@@ -1,73 +1,76 @@
 import re
 from typing import List
 
-CLEAN_REPLACEMENTS = [     
-    ('\xa0', ' '),
-    ('\u200b', ''),
-    ('\r\n', '\n'),
-]
+CLEAN_REPLACEMENTS = {
+    '\xa0': ' ',
+    '\u200b': '',
+    '\u200c': '',
+    '\u200d': '',
+    '\u2060': '',  # word joiner
+    '\ufeff': '',  # BOM / zero-width no-break space
+}
+# Substituições de um caractere aplicadas numa só passada (o CRLF, de 2 chars, fica à parte)
+_CLEAN_TABLE = str.maketrans(CLEAN_REPLACEMENTS)
+
+# Padrões compilados uma única vez no import (evita lookup no cache do `re` por chamada)
+# Só casam trechos que de fato mudam: um espaço simples ou um "\n\n" já estão normalizados
+_HSPACE_RE = re.compile(r'[ \t\f\v]{2,}|[\t\f\v]')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_SPLIT_DIGITS_RE = re.compile(r'(?<=\d)\s+(?=\d)')
+_DECIMAL_COMMA_RE = re.compile(r'(\d)\s*,\s*(\d{2})')
+_THOUSANDS_DOT_RE = re.compile(r'(?<=\d)\s*\.\s*(?=\d{3}\b)')
+_DIGIT_RE = re.compile(r'\d')
+# Ponto de inserção entre data e hora coladas (o lookbehind curto descarta rápido)
+_DATE_TIME_GLUED_RE = re.compile(r'(?<=/\d{4})(?=\d{2}:\d{2}:\d{2})(?<=\d{2}/\d{2}/\d{4})')
+
+_SIGLAS_VALIDAS = frozenset({
+    'AC','AL','AP','AM','BA','CE','DF','ES','GO','MA',
+    'MT','MS','MG','PA','PB','PR','PE','PI','RJ','RN',
+    'RS','RO','RR','SC','SP','SE','TO',
+    'NF','RG','IE','IM','CPF'
+})
 
 def normalize_whitespace(text: str) -> str: ##     Eliminar espaços em branco preserva quebras de linha (Universal)
-    text = re.sub(r'[ \t\f\v]+', ' ', text)
+    text = _HSPACE_RE.sub(' ', text)
     
-    text = re.sub(r'\n{2,}', '\n\n', text)  
+    text = _BLANK_LINES_RE.sub('\n\n', text)  
 
     return text.strip()
 
 def join_split_numbers(text: str) -> str: ##     Junta de forma conservadora pequenos tokens separadas (Sequencial Character)
-    text = re.sub(r'(?<=\d)\s+(?=\d)', '', text) 
+    text = _SPLIT_DIGITS_RE.sub('', text) 
 
     return text
 
 def normalize_commas_and_dots(text: str) -> str: ##     Identação de valore monetário & pontos extras entre decimais (Heurística)  
     
-    text = re.sub(r'(\d)\s*,\s*(\d{2})', r'\1,\2', text)
+    text = _DECIMAL_COMMA_RE.sub(r'\1,\2', text)
     
-    text = re.sub(r'(?<=\d)\s*\.\s*(?=\d{3}\b)', '', text)
+    text = _THOUSANDS_DOT_RE.sub('', text)
 
     return text
 
 def strip_lines_noise(lines: List[str]) -> List[str]: ##     Filtra linhas não-informativas
-    out = []
-    siglas_validas = {
-        'AC','AL','AP','AM','BA','CE','DF','ES','GO','MA',
-        'MT','MS','MG','PA','PB','PR','PE','PI','RJ','RN',
-        'RS','RO','RR','SC','SP','SE','TO',
-        'NF','RG','IE','IM','CPF'
-    }
-    
-    for ln in lines:
-        ln_strip = ln.strip()
-
-        if ln_strip.upper() in siglas_validas:
-            out.append(ln_strip)
-            continue
-
-        if len(ln_strip) < 3 and not re.search(r'\d', ln_strip):
-            continue
-        out.append(ln_strip)
-
-    return out
+    # Linhas curtas só sobrevivem se tiverem dígito ou forem siglas conhecidas
+    return [
+        ln for ln in map(str.strip, lines)
+        if len(ln) >= 3 or _DIGIT_RE.search(ln) or ln.upper() in _SIGLAS_VALIDAS
+    ]
 
 def fix_date_spacing(text: str) -> str: 
     """
     Garante espaço entre data e hora quando coladas pelo processo de normalização.
     Ex: 15/12/202410:30:00 -> 15/12/2024 10:30:00
     """
-    return re.sub(
-        r'(\d{2}/\d{2}/\d{4})(\d{2}:\d{2}:\d{2})',
-        r'\1 \2',
-        text
-    )
+    return _DATE_TIME_GLUED_RE.sub(' ', text)
 
 def normalize_text(text: str) -> str: 
     if not isinstance(text, str ):
         raise TypeError(
             f"normalize_text espera receber uma string, mas recebeu {type(text).__name__}"
         )
-         
-    for pat, repl in CLEAN_REPLACEMENTS:
-        text = text.replace(pat, repl)
+
+    text = text.translate(_CLEAN_TABLE).replace('\r\n', '\n')
 
     text = normalize_whitespace(text)
 
@@ -77,16 +80,7 @@ def normalize_text(text: str) -> str:
     
     text = normalize_commas_and_dots(text)
 
-    lines = text.splitlines()
-    
-    lines = strip_lines_noise(lines)
-
-    seen = set()
-    dedup_lines = []
-    for l in lines:
-        if l in seen:
-            continue
-        dedup_lines.append(l)
-        seen.add(l)
+    lines = strip_lines_noise(text.splitlines())
 
-    return "\n".join(dedup_lines)
\ No newline at end of file
+    # Remove linhas repetidas preservando a ordem da primeira ocorrência
+    return "\n".join(dict.fromkeys(lines))
\ No newline at end of file
@@ -1,7 +1,48 @@
-import re
-from typing import Dict, List, Any, Optional, TypedDict
+import unicodedata
+from functools import lru_cache, wraps
+from operator import mul
+from typing import Dict, Any, Optional, Tuple, TypedDict
 from decimal import Decimal, InvalidOperation
 
+class _DigitsOnlyTable(dict):
+    """
+    Tabela de str.translate que remove tudo que não é dígito (mesma semântica de \\D),
+    convertendo dígitos Unicode para ASCII. Preenchida sob demanda.
+    """
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = 48 + unicodedata.decimal(char) if char.isdecimal() else None
+        self[codepoint] = value
+        return value
+
+_DIGITS_ONLY = _DigitsOnlyTable()
+
+def _only_digits(value: str) -> str:
+    # Entradas vindas do parser já chegam limpas: evita a cópia
+    return value if value.isascii() and value.isdecimal() else value.translate(_DIGITS_ONLY)
+
+# DÍGITOS VERIFICADORES (módulo 11)
+
+_PESOS_CNPJ_DV1 = (5,4,3,2,9,8,7,6,5,4,3,2)
+_PESOS_CNPJ_DV2 = (6,5,4,3,2,9,8,7,6,5,4,3,2)
+_PESOS_NFE = (4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2)
+
+# 00000000000000 .. 99999999999999: passam no checksum, mas não são CNPJs reais
+_CNPJS_REPETIDOS = frozenset(str(d) * 14 for d in range(10))
+
+# b'0'..b'9' -> valores 0..9, para somar os produtos direto sobre bytes
+_ASCII_DIGIT_VALUES = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+def _digit_values(digitos: str) -> bytes:
+    return digitos.encode('ascii').translate(_ASCII_DIGIT_VALUES)
+
+# Dígito verificador indexado pelo resto: 0 e 1 viram 0, os demais 11 - resto
+_DV_POR_RESTO = (0, 0, 9, 8, 7, 6, 5, 4, 3, 2, 1)
+
+def _dv_modulo_11(valores: bytes, pesos: Tuple[int, ...]) -> int:
+    # map(mul) para no fim dos pesos: dispensa fatiar a base
+    return _DV_POR_RESTO[sum(map(mul, valores, pesos)) % 11]
+
 # MOEDAS SUPORTADAS 
 
 class CurrencyConfig(TypedDict):
@@ -49,25 +90,51 @@ CURRENCY_CONFIG: Dict[str, CurrencyConfig ] = {
     }
 }
 
+# (símbolo, moeda) na ordem de CURRENCY_CONFIG: a ordem define a prioridade (ex: ¥ -> JPY)
+_SYMBOL_INDEX = tuple(
+    (symbol.upper(), currency_code)
+    for currency_code, config in CURRENCY_CONFIG.items()
+    for symbol in config["symbols"]
+)
+
 def currency_detector(value: str) -> str:
-    value_upper = value.upper().strip()
-
-    for currency_code, config in CURRENCY_CONFIG.items():
-        for symbol in config["symbols"]:
-        ## Verifica se o simbulo aparece no inicio ou no fim  
-            if value_upper.startswith(symbol) or value_upper.endswith(symbol):
-                return currency_code
-            if symbol in value_upper:
-                return currency_code
+    value_upper = value.upper()
+
+    ## Início, fim ou meio do valor: um teste de substring cobre os três casos
+    for symbol, currency_code in _SYMBOL_INDEX:
+        if symbol in value_upper:
+            return currency_code
     
     return 'BRL'  # Default para Brasil
 
+# CACHE DOS VALIDADORES
+# Os validadores são funções puras: o mesmo CNPJ/chave/valor se repete no documento
+# (cabeçalho, rodapé) e entre documentos do mesmo emitente.
+
+VALIDATOR_CACHE_SIZE = 4096
+
+def _cached_validator(func):
+    """
+    Memoiza um validador puro. O dict em cache nunca é exposto:
+    cada chamada recebe uma cópia rasa (os valores são imutáveis).
+    """
+    cached = lru_cache(maxsize=VALIDATOR_CACHE_SIZE)(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return dict(cached(*args, **kwargs))
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+@_cached_validator
 def cnpj_validator(cnpj: str) -> Dict[str, Any]: ##     VALIDAÇÃO DE CNPJ COM CHECKSUM
     """
     Valida CNPJ com checksum
     Retorna dict com status e metadados.
     """
-    cnpj_limpo = re.sub(r'\D', '', cnpj)
+    cnpj_limpo = _only_digits(cnpj)
     
     if len(cnpj_limpo) != 14:
         return {
@@ -77,7 +144,7 @@ def cnpj_validator(cnpj: str) -> Dict[str, Any]: ##     VALIDAÇÃO DE CNPJ COM
         }
     
     # Camada 2: Padrão inválido (todos dígitos iguais)
-    if cnpj_limpo == cnpj_limpo[0] * 14:
+    if cnpj_limpo in _CNPJS_REPETIDOS:
         return {
             "valido": False,
             "erro": "CNPJ com todos dígitos repetidos",
@@ -85,16 +152,12 @@ def cnpj_validator(cnpj: str) -> Dict[str, Any]: ##     VALIDAÇÃO DE CNPJ COM
         }
     
     # Camada 3: Checksum (algoritmo oficial da Receita)
-    def calcular_digito(base: str, pesos: List[int]) -> int:
-        soma = sum(int(d) * p for d, p in zip(base, pesos))
-        resto = soma % 11
-        return 0 if resto < 2 else 11 - resto
-    
+    valores = _digit_values(cnpj_limpo)
+
     # Valida primeiro dígito verificador
-    pesos_1 = [5,4,3,2,9,8,7,6,5,4,3,2]
-    dv1 = calcular_digito(cnpj_limpo[:12], pesos_1)
+    dv1 = _dv_modulo_11(valores, _PESOS_CNPJ_DV1)
     
-    if int(cnpj_limpo[12]) != dv1:
+    if valores[12] != dv1:
         return {
             "valido": False,
             "erro": f"Dígito verificador 1 incorreto (esperado {dv1})",
@@ -102,10 +165,9 @@ def cnpj_validator(cnpj: str) -> Dict[str, Any]: ##     VALIDAÇÃO DE CNPJ COM
         }
     
     # Valida segundo dígito verificador
-    pesos_2 = [6,5,4,3,2,9,8,7,6,5,4,3,2]
-    dv2 = calcular_digito(cnpj_limpo[:13], pesos_2)
+    dv2 = _dv_modulo_11(valores, _PESOS_CNPJ_DV2)
     
-    if int(cnpj_limpo[13]) != dv2:
+    if valores[13] != dv2:
         return {
             "valido": False,
             "erro": f"Dígito verificador 2 incorreto (esperado {dv2})",
@@ -123,12 +185,23 @@ def cnpj_validator(cnpj: str) -> Dict[str, Any]: ##     VALIDAÇÃO DE CNPJ COM
 
 # VALIDAÇÃO DE CHAVE NF-e
 
+_UFS_VALIDAS = frozenset({
+    '11','12','13','14','15','16','17',  # Norte
+    '21','22','23','24','25','26','27','28','29',  # Nordeste
+    '31','32','33','35',  # Sudeste
+    '41','42','43',  # Sul
+    '50','51','52','53'  # Centro-Oeste
+})
+
+_MODELOS_VALIDOS = frozenset({'55', '65'})  # NF-e, NFC-e
+
+@_cached_validator
 def nfe_key_validator(chave: str) -> Dict[str, Any]:
     """
     Valida chave de acesso NF-e (44 dígitos).
     Estrutura: UF(2) + AAMM(4) + CNPJ(14) + Modelo(2)
     """
-    chave_limpa = re.sub(r'\D', '', chave)
+    chave_limpa = _only_digits(chave)
     
     # Camada 1: Tamanho
     if len(chave_limpa) != 44:
@@ -146,15 +219,7 @@ def nfe_key_validator(chave: str) -> Dict[str, Any]:
     dv = chave_limpa[43]
     
     # UF válida (códigos IBGE)
-    ufs_validas = {
-        '11','12','13','14','15','16','17',  # Norte
-        '21','22','23','24','25','26','27','28','29',  # Nordeste
-        '31','32','33','35',  # Sudeste
-        '41','42','43',  # Sul
-        '50','51','52','53'  # Centro-Oeste
-    }
-    
-    if uf not in ufs_validas:
+    if uf not in _UFS_VALIDAS:
         return {
             "valido": False,
             "erro": f"Código UF inválido: {uf}",
@@ -189,7 +254,7 @@ def nfe_key_validator(chave: str) -> Dict[str, Any]:
         }
     
     # Camada 4: Modelo de documento
-    if modelo not in ['55', '65']:
+    if modelo not in _MODELOS_VALIDOS:
         return {
             "valido": False,
             "erro": f"Modelo inválido: {modelo} (esperado 55=NF-e ou 65=NFC-e)",
@@ -206,13 +271,7 @@ def nfe_key_validator(chave: str) -> Dict[str, Any]:
         }
     
     # Camada 6: Dígito verificador (módulo 11)
-    def calcular_dv_nfe(chave_43: str) -> int:
-        pesos = [4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2,9,8,7,6,5,4,3,2]
-        soma = sum(int(d) * p for d, p in zip(chave_43, pesos))
-        resto = soma % 11
-        return 0 if resto in [0, 1] else 11 - resto
-    
-    dv_calculado = calcular_dv_nfe(chave_limpa[:43])
+    dv_calculado = _dv_modulo_11(_digit_values(chave_limpa), _PESOS_NFE)
     
     if int(dv) != dv_calculado:
         return {
@@ -236,6 +295,10 @@ def nfe_key_validator(chave: str) -> Dict[str, Any]:
 
 # VALIDAÇÃO DE VALORES MONETÁRIOS 
 
+_CENTAVO = Decimal('0.01')
+_VALOR_MAXIMO = Decimal('1000000000')  # acima disso o valor é tratado como absurdo
+
+@_cached_validator
 def monetari_value_validator(
         valor: str,
         fiscal_context: bool = False,
@@ -314,7 +377,7 @@ def monetari_value_validator(
             "confianca": 100
         }
     
-    if valor_decimal > Decimal('1000000000'): 
+    if valor_decimal > _VALOR_MAXIMO: 
         return {
             "valido": False,
             "erro": f"Valor absurdo: R$ {valor_decimal:,.2f}",
@@ -324,7 +387,7 @@ def monetari_value_validator(
     
     # Verifica se tem mais de 2 casas decimais (improvável em NF)
     try:
-        valor_normalized = valor_decimal.quantize(Decimal('0.01'))
+        valor_normalized = valor_decimal.quantize(_CENTAVO)
         if valor_decimal != valor_normalized:
             return {
                 "valido": False,
@@ -1,15 +1,20 @@
 import hashlib
 import time
 import os
+import dataclasses
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Union, Optional, Dict, List, Any 
+from typing import Union, Optional, Dict, List, Any, Callable, Sequence
 from pathlib import Path
 
-from .pdf_reader import pdf_path_to_text, pdf_bytes_to_text, PDFExtractionResult
+from .constants import PDF_MAGIC
+from .pdf_reader import pdf_bytes_to_text, PDFExtractionResult
 from .core.text_normalizer import normalize_text
 from .core.parser import extract_from_text
 from .core.validators import nfe_key_validator, cnpj_validator, validator_valor_fiscal_brasileiro
-from .schema.orchestrator_models import PipelineResult, OrchestratorEvent
+from .schema.orchestrator_models import PipelineResult, OrchestratorEvent, ValidationIssue
 
 class Orchestrator:
     """
@@ -18,8 +23,16 @@ class Orchestrator:
     NÃO decide persistência. Apenas gera eventos confiáveis.
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, result_cache_size: int = 0):
+        """
+        result_cache_size > 0 liga o cache LRU de extrações por hash do input: reenvios idênticos
+        reusam o payload de NORMALIZE/PARSE e vão direto ao VALIDATE. Desligado por padrão (instância sem estado).
+        Opção de biblioteca: nenhum caller do repositório (API, main.py) liga o cache; quem instancia
+        o Orchestrator decide. Com o cache desligado os eventos não trazem a chave "cache".
+        """
+        self.result_cache_size = result_cache_size
+        # hash do input -> (metadados do reader, payload extraído, detalhes do NORMALIZE sem duração)
+        self._result_cache: "OrderedDict[str, tuple[PDFExtractionResult, Any, Dict[str, Any]]]" = OrderedDict()
 
     def _calculate_hash(self, data: Union[str, bytes]) -> str:
         """Gera SHA-256 determinístico do conteúdo."""
@@ -31,24 +44,35 @@ class Orchestrator:
 
     # Configuração de Scoring (Trust Layer)
     BASE_SCORE = 1.0
-    PENALTIES = {
+    # Somente leitura: tabela compartilhada por todas as instâncias
+    PENALTIES = MappingProxyType({
         "missing_issuer_cnpj": 1.0, # Fatal (Critical)
         "invalid_issuer_cnpj": 1.0, # Fatal (Critical)
         "missing_total": 0.5,       # High impact
+        "invalid_total_format": 0.3,# Warning (OCR)
         "missing_recipient": 0.1,   # Warning
         "invalid_key": 0.2,         # Warning
         "low_confidence_item": 0.05 # Minor per item
-    }
+    })
 
-    def _validate_stage(self, payload) -> tuple[List[Any], float]:
+    @staticmethod
+    def _parse_details(extraction_result) -> Dict[str, Any]:
+        """Resumo do payload registrado no evento PARSE (extração nova ou vinda do cache)."""
+        return {
+            "items_count": len(extraction_result.items), 
+            "issuer_found": bool(extraction_result.issuer), 
+            "recipient_found": bool(extraction_result.recipient), 
+            "total_value": extraction_result.financials.total
+        }
+
+    def _validate_stage(self, payload) -> tuple[List[Any], float, bool]:
         """
         Executa validações semânticas e calcula Trust Score.
-        Retorna (issues, score).
+        Retorna (issues, score, has_critical_error); o erro crítico é marcado no append, sem varrer issues de novo.
         """
         issues = []
         score = self.BASE_SCORE
-        
-        from .schema.orchestrator_models import ValidationIssue
+        has_critical_error = False
 
         # 1. Valida Emitente (Crítico)
         if not payload.issuer or not payload.issuer.cnpj_cpf:
@@ -59,6 +83,7 @@ class Orchestrator:
                 severity="error"
             ))
             score -= self.PENALTIES["missing_issuer_cnpj"]
+            has_critical_error = True
         else:
             val_cnpj = cnpj_validator(payload.issuer.cnpj_cpf)
             if not val_cnpj["valido"]:
@@ -69,6 +94,7 @@ class Orchestrator:
                     severity="error"
                 ))
                  score -= self.PENALTIES["invalid_issuer_cnpj"]
+                 has_critical_error = True
 
         # 2. Valida Tomador (Aviso)
         if not payload.recipient or not payload.recipient.cnpj_cpf:
@@ -89,6 +115,7 @@ class Orchestrator:
                 severity="error"
             ))
              score -= self.PENALTIES["missing_total"]
+             has_critical_error = True
         else:
              val_total = validator_valor_fiscal_brasileiro(payload.financials.total)
              if not val_total["valido"]:
@@ -98,7 +125,7 @@ class Orchestrator:
                     message=f"Formato inválido: {val_total.get('erro')}",
                     severity="warning" # Pode ser warning se o OCR errou algo sutil, mas impacta score
                 ))
-                  score -= 0.3
+                  score -= self.PENALTIES["invalid_total_format"]
 
         # 4. Valida Chave (Aviso)
         if payload.chave_acesso:
@@ -113,7 +140,7 @@ class Orchestrator:
                  score -= self.PENALTIES["invalid_key"]
 
         # Clamp score
-        return issues, max(0.0, score)
+        return issues, max(0.0, score), has_critical_error
 
     def process(self, input_data: Union[str, bytes, Path], context: Dict[str, str]) -> PipelineResult:
         """
@@ -142,7 +169,7 @@ class Orchestrator:
             # e adicionando o VALIDATE.
             
             # --- READ STAGE ---
-            start_read = time.time()
+            start_read = time.perf_counter()
             pdf_result: Optional[PDFExtractionResult] = None
             input_type = "bytes"
             input_source = "memory"
@@ -154,15 +181,25 @@ class Orchestrator:
                     input_source = input_path
                     if not os.path.exists(input_path):
                         raise FileNotFoundError(f"File not found: {input_path}")
+                    # Uma única leitura do disco alimenta o hash e o reader
                     with open(input_path, "rb") as f:
-                        file_bytes = f.read()
-                        input_hash = self._calculate_hash(file_bytes)
-                    pdf_result = pdf_path_to_text(input_path)
+                        pdf_bytes = f.read()
                 else:
-                    input_hash = self._calculate_hash(input_data)
-                    pdf_result = pdf_bytes_to_text(input_data)
+                    pdf_bytes = input_data
+                # Assinatura inválida falha aqui, antes do hash e do fitz
+                if not pdf_bytes.startswith(PDF_MAGIC):
+                    raise ValueError("Input não é um PDF (assinatura %PDF- ausente)")
+                input_hash = self._calculate_hash(pdf_bytes)
 
-                duration_read = time.time() - start_read
+                cached = self._result_cache.get(input_hash) if self.result_cache_size else None
+                if cached is not None:
+                    self._result_cache.move_to_end(input_hash)
+                    pdf_result = cached[0]
+                else:
+                    pdf_result = pdf_bytes_to_text(pdf_bytes)
+                # Marca hit/miss nos eventos só quando o cache existe
+                cache_info = {"cache": "hit" if cached is not None else "miss"} if self.result_cache_size else {}
+                duration_read = time.perf_counter() - start_read
                 result.raw_metadata = {
                     "input_hash_sha256": input_hash,
                     "input_type": input_type,
@@ -176,7 +213,8 @@ class Orchestrator:
                         "duration_sec": round(duration_read, 4), 
                         "page_count": pdf_result.page_count, 
                         "extraction_method": pdf_result.extration_method, 
-                        "input_source": input_source
+                        "input_source": input_source,
+                        **cache_info
                     },
                     error_policy="CONTINUE"
                 ))
@@ -189,73 +227,98 @@ class Orchestrator:
                 ))
                 raise e
 
-            # --- NORMALIZE STAGE ---
-            start_norm = time.time()
-            raw_text = pdf_result.text
-            raw_text_hash = self._calculate_hash(raw_text)
-            
-            try:
-                normalized_text = normalize_text(raw_text)
-                duration_norm = time.time() - start_norm
-                normalized_text_hash = self._calculate_hash(normalized_text)
-                
+            if cached is not None:
+                # Cache hit: payload já extraído deste mesmo conteúdo; cópia para não vazar mutações.
+                # O nome do arquivo é do input atual (mesmo conteúdo pode chegar com outro nome)
+                extraction_result = cached[1].model_copy(
+                    update={"source_filename": str(input_source)}, deep=True
+                )
+                # O audit trail mantém NORMALIZE/PARSE com as mesmas chaves da extração original
+                # (hashes e métricas dela; duração zero, pois nada foi reprocessado)
                 result.events.append(OrchestratorEvent(
                     stage="NORMALIZE", status="SUCCESS", timestamp=datetime.now(),
-                    details={
-                        "duration_sec": round(duration_norm, 4), 
+                    details={"duration_sec": 0.0, **cached[2], **cache_info},
+                    error_policy="CONTINUE"
+                ))
+                result.events.append(OrchestratorEvent(
+                    stage="PARSE", status="SUCCESS", timestamp=datetime.now(),
+                    details={"duration_sec": 0.0, **self._parse_details(extraction_result), **cache_info},
+                    error_policy="CONTINUE"
+                ))
+            else:
+                # --- NORMALIZE STAGE ---
+                start_norm = time.perf_counter()
+                raw_text = pdf_result.text
+                raw_text_hash = pdf_result.text_sha256
+            
+                try:
+                    normalized_text = normalize_text(raw_text)
+                    duration_norm = time.perf_counter() - start_norm
+                    normalized_text_hash = self._calculate_hash(normalized_text)
+                    normalize_details = {
                         "raw_text_hash_sha256": raw_text_hash, 
                         "normalized_text_hash_sha256": normalized_text_hash, 
                         "reduction_ratio": round(
                             1 - (len(normalized_text)/len(raw_text)), 2
                             ) 
                             if len(raw_text) > 0 else 0
-                    },
-                    error_policy="CONTINUE"
-                ))
-            except Exception as e:
-                result.events.append(OrchestratorEvent(
-                    stage="NORMALIZE",
-                    status="FAILURE",
-                    details={"error": str(e)},
-                    error_policy="ABORT"
-                ))
-                raise e
+                    }
+                
+                    result.events.append(OrchestratorEvent(
+                        stage="NORMALIZE", status="SUCCESS", timestamp=datetime.now(),
+                        details={"duration_sec": round(duration_norm, 4), **normalize_details, **cache_info},
+                        error_policy="CONTINUE"
+                    ))
+                except Exception as e:
+                    result.events.append(OrchestratorEvent(
+                        stage="NORMALIZE",
+                        status="FAILURE",
+                        details={"error": str(e)},
+                        error_policy="ABORT"
+                    ))
+                    raise e
 
-            # --- PARSE STAGE ---
-            start_parse = time.time()
-            try:
-                extraction_result = extract_from_text(normalized_text, source_filename=str(input_source))
-                duration_parse = time.time() - start_parse
+                # --- PARSE STAGE ---
+                start_parse = time.perf_counter()
+                try:
+                    extraction_result = extract_from_text(normalized_text, source_filename=str(input_source))
+                    duration_parse = time.perf_counter() - start_parse
                 
-                result.events.append(OrchestratorEvent(
-                    stage="PARSE", status="SUCCESS", timestamp=datetime.now(),
-                    details={
-                        "duration_sec": round(duration_parse, 4), 
-                        "items_count": len(extraction_result.items), 
-                        "issuer_found": bool(extraction_result.issuer), 
-                        "recipient_found": bool(extraction_result.recipient), 
-                        "total_value": extraction_result.financials.total
-                    },
-                    error_policy="CONTINUE"
-                ))
-            except Exception as e:
-                result.events.append(OrchestratorEvent(
-                    stage="PARSE",
-                    status="FAILURE",
-                    details={"error": str(e)},
-                    error_policy="ABORT"
-                ))
-                raise e
+                    result.events.append(OrchestratorEvent(
+                        stage="PARSE", status="SUCCESS", timestamp=datetime.now(),
+                        details={
+                            "duration_sec": round(duration_parse, 4), 
+                            **self._parse_details(extraction_result),
+                            **cache_info
+                        },
+                        error_policy="CONTINUE"
+                    ))
+                except Exception as e:
+                    result.events.append(OrchestratorEvent(
+                        stage="PARSE",
+                        status="FAILURE",
+                        details={"error": str(e)},
+                        error_policy="ABORT"
+                    ))
+                    raise e
+
+                if self.result_cache_size:
+                    # Só os metadados do reader ficam no cache; o texto bruto já foi consumido
+                    self._result_cache[input_hash] = (
+                        dataclasses.replace(pdf_result, text=""),
+                        extraction_result.model_copy(deep=True),
+                        normalize_details
+                    )
+                    if len(self._result_cache) > self.result_cache_size:
+                        self._result_cache.popitem(last=False)
 
             # --- VALIDATE STAGE (NEW) ---
-            start_validate = time.time()
+            start_validate = time.perf_counter()
             try:
-                issues, score = self._validate_stage(extraction_result)
-                duration_validate = time.time() - start_validate
+                issues, score, has_critical_error = self._validate_stage(extraction_result)
+                duration_validate = time.perf_counter() - start_validate
                 
                 # Decisão de Status
-                has_critical_error = any(i.severity == "error" for i in issues)
-                
                 final_status = "success"
                 if has_critical_error:
                     final_status = "error"
@@ -296,3 +359,42 @@ class Orchestrator:
             result.end_time = datetime.now()
             
         return result
+
+    def process_batch(
+            self,
+            inputs: Sequence[Union[str, bytes, Path]],
+            context_factory: Callable[[Union[str, bytes, Path]], Dict[str, str]],
+            max_workers: Optional[int] = None
+    ) -> List[PipelineResult]:
+        """
+        Executa o pipeline para um lote de documentos em processos separados.
+        READ/NORMALIZE/PARSE são CPU-bound e independentes entre documentos: processos evitam o GIL.
+        O contexto de cada documento é gerado no processo pai; a ordem dos resultados segue `inputs`.
+        """
+        if not inputs:
+            return []
+        contexts = [context_factory(item) for item in inputs]
+
+        # Lotes por worker amortizam o pickling sem deixar workers ociosos em lotes pequenos;
+        # nunca sobe mais processos do que documentos
+        workers = min(max_workers or os.cpu_count() or 1, len(inputs))
+        chunksize = max(1, len(inputs) // (workers * 4))
+
+        # Cada worker monta um Orchestrator com a configuração desta instância (ex: result_cache_size)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self.result_cache_size,)
+        ) as executor:
+            return list(executor.map(_process_in_worker, inputs, contexts, chunksize=chunksize))
+
+
+# Orchestrator do processo worker, criado uma vez por _init_worker e reusado entre documentos
+_worker_orchestrator: Optional[Orchestrator] = None
+
+def _init_worker(result_cache_size: int) -> None:
+    """Initializer dos workers de process_batch: replica a configuração do Orchestrator pai."""
+    global _worker_orchestrator
+    _worker_orchestrator = Orchestrator(result_cache_size=result_cache_size)
+
+def _process_in_worker(input_data: Union[str, bytes, Path], context: Dict[str, str]) -> PipelineResult:
+    """Ponto de entrada dos workers de process_batch (função de módulo para ser picklável)."""
+    return _worker_orchestrator.process(input_data, context)
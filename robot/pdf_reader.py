@@ -1,7 +1,13 @@
+import hashlib
+import os
+import re
+
 import fitz
-from typing import NamedTuple, Literal
+from dataclasses import dataclass
+from typing import Literal
 
-class PDFExtractionResult(NamedTuple):
+@dataclass(slots=True, frozen=True)
+class PDFExtractionResult:
     """
     CONTRATO DE SAÍDA RETORNADO PELO pdf_reader
     """
@@ -19,6 +25,17 @@ class PDFExtractionResult(NamedTuple):
 
     file_size_kb: float
 
+    text_sha256: str
+
+# Espaço não separável e caracteres de largura zero: uma varredura em vez de quatro
+_UNICODE_ISSUES_RE = re.compile('[\xa0\u200b\u200c\u200d]')
+
+def _join_pages_text(doc: fitz.Document) -> str:
+    """
+    Concatena o texto das páginas acessando-as por índice (sem o iterador do Document).
+    """
+    page_count = doc.page_count
+    return "\n".join([doc.load_page(i).get_text("text") for i in range(page_count)])
 
 def pdf_path_to_text(path: str) -> PDFExtractionResult:
     """
@@ -26,21 +43,16 @@ def pdf_path_to_text(path: str) -> PDFExtractionResult:
     """
     doc = fitz.open(path)
 
-    text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text())
-
-    raw_text = "\n".join(text_parts)
+    raw_text = _join_pages_text(doc)
 
-    has_issues = any(
-        char in raw_text
-        for char in ['\xa0', '\u200b', '\u200c', '\u200d']
-    )
+    has_issues = _UNICODE_ISSUES_RE.search(raw_text) is not None
 
+    # Um único encode alimenta tamanho e hash do texto (o orchestrator não re-encoda)
     try:
-        raw_text.encode('utf-8')
+        text_bytes = raw_text.encode('utf-8')
         encoding = "utf-8"
     except UnicodeEncodeError:
+        text_bytes = raw_text.encode("utf-8", errors="ignore")
         encoding = "unknown"
 
     result = PDFExtractionResult(
@@ -49,8 +61,9 @@ def pdf_path_to_text(path: str) -> PDFExtractionResult:
         has_unicode_issuer=has_issues,
         encoding=encoding,
         extration_method="embedded",  # FITZ usa embedded text
-        size_bytes=len(raw_text.encode("utf-8", errors="ignore")),
-        file_size_kb=len(doc.tobytes()) / 1024,
+        size_bytes=len(text_bytes),
+        file_size_kb=os.path.getsize(path) / 1024,
+        text_sha256=hashlib.sha256(text_bytes).hexdigest(),
     ) 
 
     doc.close()
@@ -63,21 +76,16 @@ def pdf_bytes_to_text(pdf_bytes: bytes) -> PDFExtractionResult:
     """
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
 
-    text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text())
-    
-    raw_text = "\n".join(text_parts)
+    raw_text = _join_pages_text(doc)
 
-    has_issues = any(
-        char in raw_text
-        for char in ['\xa0', '\u200b', '\u200c', '\u200d']
-    )
+    has_issues = _UNICODE_ISSUES_RE.search(raw_text) is not None
 
+    # Um único encode alimenta tamanho e hash do texto (o orchestrator não re-encoda)
     try:
-        raw_text.encode('utf-8')
+        text_bytes = raw_text.encode('utf-8')
         encoding = "utf-8"
     except UnicodeEncodeError:
+        text_bytes = raw_text.encode("utf-8", errors="ignore")
         encoding = "unknown"
 
     result = PDFExtractionResult(
@@ -86,8 +94,9 @@ def pdf_bytes_to_text(pdf_bytes: bytes) -> PDFExtractionResult:
         has_unicode_issuer=has_issues,
         encoding=encoding,
         extration_method="embedded", 
-        size_bytes=len(raw_text.encode("utf-8", errors="ignore")),
+        size_bytes=len(text_bytes),
         file_size_kb=len(pdf_bytes) / 1024, 
+        text_sha256=hashlib.sha256(text_bytes).hexdigest(),
     )
 
     doc.close()
@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Literal, Any
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic_core import to_json
 from .models import InvoiceExtractionResult
 
 class ValidationIssue(BaseModel):
@@ -14,6 +15,8 @@ class OrchestratorEvent(BaseModel):
     Representa um evento imutável ocorrido durante o pipeline.
     Usado para Event Sourcing e Observabilidade.
     """
+    model_config = ConfigDict(frozen=True)
+
     timestamp: datetime = Field(default_factory=datetime.now)
     stage: Literal["READ", "NORMALIZE", "PARSE", "VALIDATE"]
     status: Literal["SUCCESS", "FAILURE"]
@@ -49,7 +52,7 @@ class PipelineResult(BaseModel):
     raw_metadata: Dict[str, Any] = Field(default_factory=dict)
 
     @staticmethod
-    def map_to_event_contract(result: "PipelineResult") -> dict:
+    def _event_contract(result: "PipelineResult", payload: Any, audit_trail: Any) -> dict:
         return {
             "event_id" : result.execution_id,
             "event_type": "fiscal.extraction.completed",
@@ -57,10 +60,26 @@ class PipelineResult(BaseModel):
             "tenant_id": result.tenant_id,
             "status": result.status, 
             "data": {
-                "payload": result.payload.model_dump() if result.payload else {},
-                "audit_trail": [event.model_dump() for event in result.events],
+                "payload": payload,
+                "audit_trail": audit_trail,
                 "metrics": {
                     "total_duration_ms": (result.end_time - result.start_time).total_seconds() * 1000
                 }
             }
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def map_to_event_contract(result: "PipelineResult") -> dict:
+        return PipelineResult._event_contract(
+            result,
+            result.payload.model_dump() if result.payload else {},
+            [event.model_dump() for event in result.events]
+        )
+
+    @staticmethod
+    def to_event_json(result: "PipelineResult") -> bytes:
+        """
+        Mesmo contrato de map_to_event_contract já serializado em JSON (bytes).
+        Os modelos vão direto para o serializer do pydantic-core: uma única passada, sem dicts intermediários.
+        """
+        return to_json(PipelineResult._event_contract(result, result.payload or {}, result.events))
@@ -1,5 +1,55 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(PROJECT_ROOT))
\ No newline at end of file
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from robot.core.text_normalizer import normalize_text
+
+@pytest.fixture(scope="session")
+def texto_nfse_completo():
+    """
+    Texto pré-extraído de NFS-e real.
+    Usado quando não há PDF disponível.
+    """
+    return """
+    PREFEITURA MUNICIPAL DE SÃO PAULO
+    NOTA FISCAL DE SERVIÇOS ELETRÔNICA - NFS-e
+    
+    Número: 123456
+    Data de Emissão: 15/12/2024 10:30:00
+    Competência: 12/2024
+    
+    PRESTADOR DE SERVIÇOS
+    EMPRESA ABC TECNOLOGIA LTDA
+    CNPJ: 04.252.011/0001-10
+    Inscrição Municipal: 123.456.789-0
+    Endereço: Rua Teste, 123 - São Paulo/SP
+    
+    TOMADOR DE SERVIÇOS
+    CLIENTE XYZ INDÚSTRIA S.A.
+    CNPJ: 11.222.333/0001-81
+    Endereço: Av Principal, 456 - São Paulo/SP
+    
+    DISCRIMINAÇÃO DOS SERVIÇOS
+    Desenvolvimento de software customizado        10 HRS    R$ 200,00    R$ 2.000,00
+    Consultoria em arquitetura de sistemas         5 HRS    R$ 250,00    R$ 1.250,00
+    Treinamento técnico da equipe                  8 HRS    R$ 150,00    R$ 1.200,00
+    
+    VALOR TOTAL DOS SERVIÇOS: R$ 4.450,00
+    
+    TRIBUTOS:
+    ISS (5%): R$ 222,50
+    
+    VALOR LÍQUIDO: R$ 4.227,50
+    
+    OBSERVAÇÕES:
+    Serviços prestados conforme contrato 2024/001
+    """
+
+@pytest.fixture(scope="session")
+def texto_nfse_norm(texto_nfse_completo):
+    """Texto da NFS-e já normalizado, compartilhado por toda a sessão."""
+    return normalize_text(texto_nfse_completo)
@@ -0,0 +1,20 @@
+import pytest
+from unittest.mock import DEFAULT, patch
+
+
+@pytest.fixture
+def orchestrator_mocks():
+    """
+    Isola o Orchestrator de reader, normalizer, parser e validators com um único patch.multiple.
+    Retorna o dict de mocks indexado pelo nome do símbolo em robot.orchestrator.
+    """
+    with patch.multiple(
+        "robot.orchestrator",
+        pdf_bytes_to_text=DEFAULT,
+        normalize_text=DEFAULT,
+        extract_from_text=DEFAULT,
+        cnpj_validator=DEFAULT,
+        validator_valor_fiscal_brasileiro=DEFAULT,
+        nfe_key_validator=DEFAULT,
+    ) as mocks:
+        yield mocks
@@ -1,10 +1,15 @@
+import hashlib
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from robot.orchestrator import Orchestrator
+from robot.pdf_reader import PDFExtractionResult
+from robot.schema.models import Financials, InvoiceExtractionResult, Party
 from robot.schema.orchestrator_models import PipelineResult
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def orchestrator():
+    # Sem result cache (padrão) a instância não guarda estado entre process(); o teste de
+    # determinismo cobre isso. Testes que ligam o cache criam a própria instância.
     return Orchestrator()
 
 @pytest.fixture
@@ -23,34 +28,31 @@ class MockPDFResult:
         self.size_bytes = size_bytes
         self.encoding = "utf-8"
         self.extration_method = "embedded"
+        self.text_sha256 = hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-@patch("robot.orchestrator.pdf_bytes_to_text")
-@patch("robot.orchestrator.normalize_text")
-@patch("robot.orchestrator.extract_from_text")
-@patch("robot.orchestrator.cnpj_validator")
-@patch("robot.orchestrator.validator_valor_fiscal_brasileiro")
-@patch("robot.orchestrator.nfe_key_validator")
-def test_orchestrator_validate_success(mock_key_val, mock_fiscal_val, mock_cnpj_val, mock_parser, mock_norm, mock_reader, orchestrator, sample_context):
+def test_orchestrator_validate_success(orchestrator_mocks, orchestrator, sample_context):
     """
     Cenário: Tudo válido. Score deve ser 1.0 e Status 'success'.
     """
-    mock_reader.return_value = MockPDFResult("Conteudo valido")
-    mock_norm.return_value = "Conteudo valido"
+    orchestrator_mocks["pdf_bytes_to_text"].return_value = MockPDFResult("Conteudo valido")
+    orchestrator_mocks["normalize_text"].return_value = "Conteudo valido"
     
     # Mock Validators Responses
-    mock_cnpj_val.return_value = {"valido": True}
-    mock_fiscal_val.return_value = {"valido": True}
-    mock_key_val.return_value = {"valido": True}
+    orchestrator_mocks["cnpj_validator"].return_value = {"valido": True}
+    orchestrator_mocks["validator_valor_fiscal_brasileiro"].return_value = {"valido": True}
+    orchestrator_mocks["nfe_key_validator"].return_value = {"valido": True}
 
     # Mock do payload extraído com tudo certo
-    mock_payload = MagicMock()
-    mock_payload.issuer.cnpj_cpf = "04.252.011/0001-10" 
-    mock_payload.recipient.cnpj_cpf = "11.222.333/0001-81"
-    mock_payload.financials.total = "R$ 1.500,00"
-    mock_payload.chave_acesso = "35241204252011000110550010000012345012345678903"
-    mock_parser.return_value = mock_payload
+    mock_payload = InvoiceExtractionResult(
+        issuer=Party(cnpj_cpf="04.252.011/0001-10"),
+        recipient=Party(cnpj_cpf="11.222.333/0001-81"),
+        financials=Financials(total="R$ 1.500,00"),
+        chave_acesso="35241204252011000110550010000012345012345678903",
+        raw_text="Conteudo valido"
+    )
+    orchestrator_mocks["extract_from_text"].return_value = mock_payload
 
-    result = orchestrator.process(b"PDF_BYTES", sample_context)
+    result = orchestrator.process(b"%PDF-1.4 PDF_BYTES", sample_context)
 
     assert result.status == "success"
     assert result.trust_score == 1.0
@@ -59,104 +61,91 @@ def test_orchestrator_validate_success(mock_key_val, mock_fiscal_val, mock_cnpj_
     assert result.events[3].stage == "VALIDATE"
     assert result.events[3].status == "SUCCESS"
 
-@patch("robot.orchestrator.pdf_bytes_to_text")
-@patch("robot.orchestrator.normalize_text")
-@patch("robot.orchestrator.extract_from_text")
-@patch("robot.orchestrator.cnpj_validator")
-@patch("robot.orchestrator.validator_valor_fiscal_brasileiro")
-@patch("robot.orchestrator.nfe_key_validator")
-def test_orchestrator_validate_partial(mock_key_val, mock_fiscal_val, mock_cnpj_val, mock_parser, mock_norm, mock_reader, orchestrator, sample_context):
+def test_orchestrator_validate_partial(orchestrator_mocks, orchestrator, sample_context):
     """
     Cenário: Emitente válido (crítico ok), mas Tomador ausente (warning).
     Status deve ser 'partial' e Score < 1.0.
     """
-    mock_reader.return_value = MockPDFResult()
-    mock_norm.return_value = ""
+    orchestrator_mocks["pdf_bytes_to_text"].return_value = MockPDFResult()
+    orchestrator_mocks["normalize_text"].return_value = ""
     
-    mock_cnpj_val.return_value = {"valido": True}
-    mock_fiscal_val.return_value = {"valido": True}
-    mock_key_val.return_value = {"valido": True}
+    orchestrator_mocks["cnpj_validator"].return_value = {"valido": True}
+    orchestrator_mocks["validator_valor_fiscal_brasileiro"].return_value = {"valido": True}
+    orchestrator_mocks["nfe_key_validator"].return_value = {"valido": True}
     
-    mock_payload = MagicMock()
-    mock_payload.issuer.cnpj_cpf = "04.252.011/0001-10" # Válido
-    mock_payload.financials.total = "R$ 1.000,00" # Válido
+    mock_payload = InvoiceExtractionResult(
+        issuer=Party(cnpj_cpf="04.252.011/0001-10"), # Válido
+        financials=Financials(total="R$ 1.000,00"), # Válido
+        # Falhas / Warnings
+        recipient=None, # Missing Recipient (Warning)
+        chave_acesso=None, # Missing Key (opcional: só é validada quando presente)
+        raw_text=""
+    )
     
-    # Falhas / Warnings
-    mock_payload.recipient = None # Missing Recipient (Warning)
-    mock_payload.chave_acesso = None # Missing Key (not invalid, just missing optional check logic if not None, but wait logic says 'if payload.chave_acesso')
-    
-    mock_parser.return_value = mock_payload
+    orchestrator_mocks["extract_from_text"].return_value = mock_payload
 
-    result = orchestrator.process(b"PDF_BYTES", sample_context)
+    result = orchestrator.process(b"%PDF-1.4 PDF_BYTES", sample_context)
 
     assert result.status == "partial"
     assert result.trust_score < 1.0
     assert result.trust_score >= 0.0
     
     # Verifica issues
-    codes = [i.code for i in result.validation_issues]
+    codes = {i.code for i in result.validation_issues}
     assert "MISSING_RECIPIENT" in codes
     
-@patch("robot.orchestrator.pdf_bytes_to_text")
-@patch("robot.orchestrator.normalize_text")
-@patch("robot.orchestrator.extract_from_text")
-@patch("robot.orchestrator.cnpj_validator")
-@patch("robot.orchestrator.validator_valor_fiscal_brasileiro")
-@patch("robot.orchestrator.nfe_key_validator")
-def test_orchestrator_validate_error(mock_key_val, mock_fiscal_val, mock_cnpj_val, mock_parser, mock_norm, mock_reader, orchestrator, sample_context):
+def test_orchestrator_validate_error(orchestrator_mocks, orchestrator, sample_context):
     """
     Cenário: Emitente inválido (crítico). Status deve ser 'error'.
     """
-    mock_reader.return_value = MockPDFResult()
-    mock_norm.return_value = ""
+    orchestrator_mocks["pdf_bytes_to_text"].return_value = MockPDFResult()
+    orchestrator_mocks["normalize_text"].return_value = ""
 
     # Mock Validador retornando invalido
-    mock_cnpj_val.return_value = {"valido": False, "erro": "Checksum inválido"}
-    mock_fiscal_val.return_value = {"valido": True}
+    orchestrator_mocks["cnpj_validator"].return_value = {"valido": False, "erro": "Checksum inválido"}
+    orchestrator_mocks["validator_valor_fiscal_brasileiro"].return_value = {"valido": True}
     
-    mock_payload = MagicMock()
-    mock_payload.issuer.cnpj_cpf = "00.000.000/0000-00"
-    mock_payload.financials.total = "R$ 100,00"
-    mock_parser.return_value = mock_payload
+    mock_payload = InvoiceExtractionResult(
+        issuer=Party(cnpj_cpf="00.000.000/0000-00"),
+        financials=Financials(total="R$ 100,00"),
+        raw_text=""
+    )
+    orchestrator_mocks["extract_from_text"].return_value = mock_payload
 
-    result = orchestrator.process(b"PDF_BYTES", sample_context)
+    result = orchestrator.process(b"%PDF-1.4 PDF_BYTES", sample_context)
 
     assert result.status == "error"
     # Embora seja sucesso técnico do pipeline (não crashou), é erro de negócio crítico
     assert result.trust_score < 1.0
-    assert any(i.code == "INVALID_ISSUER_CNPJ" for i in result.validation_issues)
+    assert "INVALID_ISSUER_CNPJ" in {i.code for i in result.validation_issues}
 
-@patch("robot.orchestrator.pdf_bytes_to_text")
-@patch("robot.orchestrator.normalize_text")
-@patch("robot.orchestrator.extract_from_text")
-@patch("robot.orchestrator.cnpj_validator")
-@patch("robot.orchestrator.validator_valor_fiscal_brasileiro")
-@patch("robot.orchestrator.nfe_key_validator")
-def test_orchestrator_consistency_determinism(mock_key_val, mock_fiscal_val, mock_cnpj_val, mock_parser, mock_norm, mock_reader, orchestrator, sample_context):
+def test_orchestrator_consistency_determinism(orchestrator_mocks, orchestrator, sample_context):
     """
     Cenário: Duas execuções com mesmo input produzem resultados idênticos.
     Garante ausência de estado compartilhado/escondido.
     """
-    mock_reader.return_value = MockPDFResult("Static Content")
-    mock_norm.return_value = "Static Content"
+    orchestrator_mocks["pdf_bytes_to_text"].return_value = MockPDFResult("Static Content")
+    orchestrator_mocks["normalize_text"].return_value = "Static Content"
     
-    mock_cnpj_val.return_value = {"valido": True}
-    mock_fiscal_val.return_value = {"valido": True}
-    mock_key_val.return_value = {"valido": True}
-
-    fixed_payload = MagicMock()
-    fixed_payload.issuer.cnpj_cpf = "04.252.011/0001-10"
-    fixed_payload.recipient.cnpj_cpf = "11.222.333/0001-81" 
-    fixed_payload.financials.total = "R$ 500,00"
-    fixed_payload.chave_acesso = "35241204252011000110550010000012345012345678903"
+    orchestrator_mocks["cnpj_validator"].return_value = {"valido": True}
+    orchestrator_mocks["validator_valor_fiscal_brasileiro"].return_value = {"valido": True}
+    orchestrator_mocks["nfe_key_validator"].return_value = {"valido": True}
+
+    fixed_payload = InvoiceExtractionResult(
+        issuer=Party(cnpj_cpf="04.252.011/0001-10"),
+        recipient=Party(cnpj_cpf="11.222.333/0001-81"),
+        financials=Financials(total="R$ 500,00"),
+        chave_acesso="35241204252011000110550010000012345012345678903",
+        raw_text="Static Content"
+    )
     
-    mock_parser.return_value = fixed_payload
+    orchestrator_mocks["extract_from_text"].return_value = fixed_payload
 
     # Execução 1
-    res1 = orchestrator.process(b"STATIC_INPUT", sample_context)
+    res1 = orchestrator.process(b"%PDF-1.4 STATIC_INPUT", sample_context)
     
     # Execução 2
-    res2 = orchestrator.process(b"STATIC_INPUT", sample_context)
+    res2 = orchestrator.process(b"%PDF-1.4 STATIC_INPUT", sample_context)
     
     # Assert Identidade
     assert res1.status == res2.status
@@ -167,4 +156,157 @@ def test_orchestrator_consistency_determinism(mock_key_val, mock_fiscal_val, moc
     # Assert Conteúdo Issues
     issues1 = [i.model_dump() for i in res1.validation_issues]
     issues2 = [i.model_dump() for i in res2.validation_issues]
-    assert issues1 == issues2
\ No newline at end of file
+    assert issues1 == issues2
+
+@patch("robot.orchestrator.pdf_bytes_to_text")
+def test_orchestrator_file_read_once(mock_reader, orchestrator, sample_context, tmp_path):
+    """
+    Cenário: Arquivo lido uma única vez; hash e reader recebem os mesmos bytes.
+    """
+    content = b"%PDF-1.4 conteudo de teste"
+    pdf_path = tmp_path / "nota.pdf"
+    pdf_path.write_bytes(content)
+    mock_reader.return_value = MockPDFResult("Conteudo valido")
+
+    result = orchestrator.process(str(pdf_path), sample_context)
+
+    mock_reader.assert_called_once_with(content)
+    assert result.raw_metadata["input_hash_sha256"] == hashlib.sha256(content).hexdigest()
+
+@patch("robot.orchestrator.pdf_bytes_to_text")
+def test_orchestrator_result_cache_skips_extraction(mock_reader, sample_context):
+    """
+    Cenário: Reenvio do mesmo conteúdo com cache ligado reusa NORMALIZE/PARSE (eventos marcados como hit) e revalida o payload.
+    """
+    orchestrator = Orchestrator(result_cache_size=2)
+    text = "EMITENTE CNPJ 04.252.011/0001-10"
+    mock_reader.return_value = PDFExtractionResult(
+        text=text, page_count=1, has_unicode_issuer=False, encoding="utf-8",
+        extration_method="embedded", size_bytes=len(text), file_size_kb=0.1,
+        text_sha256=hashlib.sha256(text.encode("utf-8")).hexdigest()
+    )
+
+    res1 = orchestrator.process(b"%PDF-1.4 mesmo conteudo", sample_context)
+    res2 = orchestrator.process(b"%PDF-1.4 mesmo conteudo", {**sample_context, "trace_id": "trace-val-002"})
+
+    mock_reader.assert_called_once()
+    assert [e.stage for e in res2.events] == ["READ", "NORMALIZE", "PARSE", "VALIDATE"]
+    assert [e.details["cache"] for e in res2.events[:3]] == ["hit", "hit", "hit"]
+    for stage in (1, 2):
+        # Eventos do hit têm as mesmas chaves e dados da extração original; só a duração zera
+        original, hit = res1.events[stage].details, res2.events[stage].details
+        assert hit.keys() == original.keys()
+        assert hit["duration_sec"] == 0.0
+        assert {k: v for k, v in hit.items() if k not in ("duration_sec", "cache")} == \
+            {k: v for k, v in original.items() if k not in ("duration_sec", "cache")}
+    assert res2.trace_id == "trace-val-002"
+    assert res2.payload == res1.payload
+    assert res2.payload is not res1.payload
+    assert res2.raw_metadata["input_hash_sha256"] == res1.raw_metadata["input_hash_sha256"]
+
+def test_orchestrator_events_without_cache_have_no_cache_key(orchestrator_mocks, orchestrator, sample_context):
+    """
+    Cenário: Com o cache desligado (padrão) os eventos não reportam hit/miss de um cache inexistente.
+    """
+    orchestrator_mocks["pdf_bytes_to_text"].return_value = MockPDFResult("Conteudo valido")
+    orchestrator_mocks["normalize_text"].return_value = "Conteudo valido"
+    orchestrator_mocks["extract_from_text"].return_value = InvoiceExtractionResult(
+        financials=Financials(total=None),
+        raw_text="Conteudo valido"
+    )
+
+    result = orchestrator.process(b"%PDF-1.4 PDF_BYTES", sample_context)
+
+    assert [e.stage for e in result.events] == ["READ", "NORMALIZE", "PARSE", "VALIDATE"]
+    assert all("cache" not in e.details for e in result.events)
+
+@patch("robot.orchestrator.pdf_bytes_to_text")
+def test_orchestrator_result_cache_uses_current_filename(mock_reader, sample_context, tmp_path):
+    """
+    Cenário: Mesmo conteúdo com outro nome de arquivo sai do cache com o source_filename do input atual.
+    """
+    orchestrator = Orchestrator(result_cache_size=2)
+    text = "EMITENTE CNPJ 04.252.011/0001-10"
+    mock_reader.return_value = PDFExtractionResult(
+        text=text, page_count=1, has_unicode_issuer=False, encoding="utf-8",
+        extration_method="embedded", size_bytes=len(text), file_size_kb=0.1,
+        text_sha256=hashlib.sha256(text.encode("utf-8")).hexdigest()
+    )
+    a_pdf, b_pdf = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    a_pdf.write_bytes(b"%PDF-1.4 mesmo conteudo")
+    b_pdf.write_bytes(b"%PDF-1.4 mesmo conteudo")
+
+    orchestrator.process(a_pdf, sample_context)
+    res_b = orchestrator.process(b_pdf, sample_context)
+
+    assert res_b.events[0].details["cache"] == "hit"
+    assert res_b.events[0].details["input_source"] == str(b_pdf)
+    assert res_b.payload.source_filename == str(b_pdf)
+
+def test_orchestrator_process_batch_preserves_order(orchestrator):
+    """
+    Cenário: Lote processado em workers separados mantém a ordem e o contexto de cada documento.
+    """
+    inputs = [b"NOT_A_PDF_1", b"NOT_A_PDF_2", b"NOT_A_PDF_3"]
+
+    def context_factory(item):
+        return {"trace_id": item.decode(), "execution_id": "exec-batch", "tenant_id": "tenant-A"}
+
+    results = orchestrator.process_batch(inputs, context_factory, max_workers=2)
+
+    assert [r.trace_id for r in results] == ["NOT_A_PDF_1", "NOT_A_PDF_2", "NOT_A_PDF_3"]
+    assert all(isinstance(r, PipelineResult) for r in results)
+    assert all(r.events[0].stage == "READ" for r in results)
+
+def test_orchestrator_process_batch_uses_instance_config(sample_context):
+    """
+    Cenário: Workers do lote herdam o result_cache_size da instância; conteúdo repetido sai do cache.
+    """
+    import fitz
+
+    doc = fitz.open()
+    doc.new_page()
+    pdf_bytes = doc.tobytes()
+    orchestrator = Orchestrator(result_cache_size=2)
+
+    results = orchestrator.process_batch([pdf_bytes, pdf_bytes], lambda item: sample_context, max_workers=1)
+
+    assert [r.events[0].details["cache"] for r in results] == ["miss", "hit"]
+
+def test_orchestrator_events_are_immutable(orchestrator, sample_context):
+    """
+    Cenário: Eventos do audit trail não podem ser alterados após emitidos.
+    """
+    from pydantic import ValidationError
+
+    result = orchestrator.process(b"NOT_A_PDF", sample_context)
+
+    with pytest.raises(ValidationError):
+        result.events[0].status = "SUCCESS"
+
+def test_event_json_matches_event_contract(orchestrator, sample_context):
+    """
+    Cenário: Serialização em uma passada gera o mesmo contrato do map_to_event_contract.
+    """
+    import json
+    from pydantic_core import to_jsonable_python
+    from robot.core.parser import extract_from_text
+
+    result = orchestrator.process(b"NOT_A_PDF", sample_context)
+    result.payload = extract_from_text("CNPJ: 04.252.011/0001-10\nVALOR TOTAL: R$ 1.234,56")
+
+    contract = to_jsonable_python(PipelineResult.map_to_event_contract(result))
+    assert json.loads(PipelineResult.to_event_json(result)) == contract
+
+@patch("robot.orchestrator.pdf_bytes_to_text")
+def test_orchestrator_rejects_non_pdf_before_reader(mock_reader, orchestrator, sample_context):
+    """
+    Cenário: Input sem assinatura %PDF- falha no READ sem chegar ao fitz.
+    """
+    result = orchestrator.process(b"NOT_A_PDF", sample_context)
+
+    mock_reader.assert_not_called()
+    assert result.status == "error"
+    assert result.events[0].stage == "READ"
+    assert result.events[0].status == "FAILURE"
+    assert "PDF" in result.events[0].details["error"]
@@ -4,6 +4,7 @@ from pathlib import Path
 from robot.pdf_reader import pdf_bytes_to_text
 from robot.core.text_normalizer import normalize_text
 from robot.core.parser import extract_from_text
+from robot.core.validators import validator_valor_fiscal_brasileiro
 from robot.schema.models import InvoiceExtractionResult
 
 @pytest.fixture(scope="session")
@@ -15,11 +16,11 @@ def pdf_nfse_real():
 
     pdf_path = Path("C:/_repos_/saas/base-test/nacional_NFS_tests/NFS-E_Quinta_do_Bosque")
     
-    if pdf_path.exists():
-        return pdf_path.read_bytes()
-    
-    # Fallback: PDF mock para CI/CD sem arquivos reais
-    return b"%PDF-1.4 mock content"  
+    if not pdf_path.exists():
+        # CI/CD sem arquivos reais: pula antes de chamar o reader (sem exceção do fitz)
+        pytest.skip("PDF real de NFS-e indisponível (esperado em CI)")
+
+    return pdf_path.read_bytes()
 
 # TESTE E2E: Pipeline Completo
 
@@ -33,10 +34,7 @@ def test_pipeline_pdf_to_payload(pdf_nfse_real):
     
     # FASE 1: EXTRAÇÃO DO PDF
 
-    try:
-        texto_bruto = pdf_bytes_to_text(pdf_nfse_real)
-    except:
-        pytest.skip("PDF mock não processável (esperado em CI)")
+    texto_bruto = pdf_bytes_to_text(pdf_nfse_real).text
     
     assert len(texto_bruto) > 0
     
@@ -53,49 +51,8 @@ def test_pipeline_pdf_to_payload(pdf_nfse_real):
     assert isinstance(result, InvoiceExtractionResult)
     assert result.source_filename == "NFS-E_Quinta_do_Bosque.pdf"
 
-@pytest.fixture(scope="session")
-def texto_nfse_completo():
-    """
-    Texto pré-extraído de NFS-e real.
-    Usado quando não há PDF disponível.
-    """
-    return """
-    PREFEITURA MUNICIPAL DE SÃO PAULO
-    NOTA FISCAL DE SERVIÇOS ELETRÔNICA - NFS-e
-    
-    Número: 123456
-    Data de Emissão: 15/12/2024 10:30:00
-    Competência: 12/2024
-    
-    PRESTADOR DE SERVIÇOS
-    EMPRESA ABC TECNOLOGIA LTDA
-    CNPJ: 04.252.011/0001-10
-    Inscrição Municipal: 123.456.789-0
-    Endereço: Rua Teste, 123 - São Paulo/SP
-    
-    TOMADOR DE SERVIÇOS
-    CLIENTE XYZ INDÚSTRIA S.A.
-    CNPJ: 11.222.333/0001-81
-    Endereço: Av Principal, 456 - São Paulo/SP
-    
-    DISCRIMINAÇÃO DOS SERVIÇOS
-    Desenvolvimento de software customizado        10 HRS    R$ 200,00    R$ 2.000,00
-    Consultoria em arquitetura de sistemas         5 HRS    R$ 250,00    R$ 1.250,00
-    Treinamento técnico da equipe                  8 HRS    R$ 150,00    R$ 1.200,00
-    
-    VALOR TOTAL DOS SERVIÇOS: R$ 4.450,00
-    
-    TRIBUTOS:
-    ISS (5%): R$ 222,50
-    
-    VALOR LÍQUIDO: R$ 4.227,50
-    
-    OBSERVAÇÕES:
-    Serviços prestados conforme contrato 2024/001
-    """
-
 @pytest.mark.e2e
-def test_pipeline_completo_nfse(texto_nfse_completo):
+def test_pipeline_completo_nfse(texto_nfse_norm):
     """
     ✅ E2E PRINCIPAL: Input (texto) → Output (schema validado)
     
@@ -106,7 +63,7 @@ def test_pipeline_completo_nfse(texto_nfse_completo):
     4. Schema estruturado
     """
     
-    texto_normalizado = normalize_text(texto_nfse_completo)
+    texto_normalizado = texto_nfse_norm
     
     # Valida trecho de normalização 
     assert "\xa0" not in texto_normalizado  # Remove Unicode invisível
@@ -149,12 +106,12 @@ def test_pipeline_completo_nfse(texto_nfse_completo):
 
 @pytest.mark.e2e
 @pytest.mark.quality
-def test_payload_contem_metadados_auditoria(texto_nfse_completo):
+def test_payload_contem_metadados_auditoria(texto_nfse_norm):
     """
     ✅ Valida metadados necessários para event sourcing.
     """
     
-    result = extract_from_text(normalize_text(texto_nfse_completo))
+    result = extract_from_text(texto_nfse_norm)
     
     # Raw text preservado (auditoria)
     assert result.raw_text is not None
@@ -166,21 +123,21 @@ def test_payload_contem_metadados_auditoria(texto_nfse_completo):
 
 @pytest.mark.e2e
 @pytest.mark.routing
-def test_decisao_roteamento_por_valor(texto_nfse_completo):
+def test_decisao_roteamento_por_valor(texto_nfse_norm):
     """
     ✅ Baseado no payload, decide rota de processamento.
     Simula lógica que seria implementada no FastAPI.
     """
     
-    result = extract_from_text(normalize_text(texto_nfse_completo))
+    result = extract_from_text(texto_nfse_norm)
     
     # REGRA 1: Valor alto → Auditoria
 
     if result.financials.total:
-        valor_str = result.financials.total.replace("R$", "").replace(".", "").replace(",", ".").strip()
-        valor_float = float(valor_str)
+        # Mesmo validador do pipeline: Decimal exato, sem arredondamento de float
+        valor = validator_valor_fiscal_brasileiro(result.financials.total)["valor_decimal"]
         
-        if valor_float > 10000:
+        if valor > 10000:
             rota = "auditoria_fiscal"
         else:
             rota = "processamento_normal"
@@ -1,59 +1,20 @@
+import time
+
 import pytest
 
 from robot.schema.models import InvoiceExtractionResult
 from robot.core.text_normalizer import normalize_text
 from robot.core.parser import extract_from_text
 
-@pytest.fixture(scope="session")
-def texto_nfse_completo():
-    """
-    Texto pré-extraído de NFS-e real.
-    Usado quando não há PDF disponível.
-    """
-    return """
-    PREFEITURA MUNICIPAL DE SÃO PAULO
-    NOTA FISCAL DE SERVIÇOS ELETRÔNICA - NFS-e
-    
-    Número: 123456
-    Data de Emissão: 15/12/2024 10:30:00
-    Competência: 12/2024
-    
-    PRESTADOR DE SERVIÇOS
-    EMPRESA ABC TECNOLOGIA LTDA
-    CNPJ: 04.252.011/0001-10
-    Inscrição Municipal: 123.456.789-0
-    Endereço: Rua Teste, 123 - São Paulo/SP
-    
-    TOMADOR DE SERVIÇOS
-    CLIENTE XYZ INDÚSTRIA S.A.
-    CNPJ: 11.222.333/0001-81
-    Endereço: Av Principal, 456 - São Paulo/SP
-    
-    DISCRIMINAÇÃO DOS SERVIÇOS
-    Desenvolvimento de software customizado        10 HRS    R$ 200,00    R$ 2.000,00
-    Consultoria em arquitetura de sistemas         5 HRS    R$ 250,00    R$ 1.250,00
-    Treinamento técnico da equipe                  8 HRS    R$ 150,00    R$ 1.200,00
-    
-    VALOR TOTAL DOS SERVIÇOS: R$ 4.450,00
-    
-    TRIBUTOS:
-    ISS (5%): R$ 222,50
-    
-    VALOR LÍQUIDO: R$ 4.227,50
-    
-    OBSERVAÇÕES:
-    Serviços prestados conforme contrato 2024/001
-    """
-
 @pytest.mark.e2e
 @pytest.mark.robustez
-def test_pipeline_idempotente(texto_nfse_completo):
+def test_pipeline_idempotente(texto_nfse_norm):
     """
     ✅ Processamento do mesmo documento 2x = mesmo resultado.
     Garante que não há estado mutável.
     """
     
-    texto_norm = normalize_text(texto_nfse_completo)
+    texto_norm = texto_nfse_norm
     
     # Primeira execução
     result1 = extract_from_text(texto_norm)
@@ -99,15 +60,17 @@ def test_pipeline_documento_incompleto():
 
 @pytest.mark.e2e
 @pytest.mark.robustez
-@pytest.mark.parametrize("execution_number", range(10))
-def test_pipeline_performance(texto_nfse_completo, execution_number):
+def test_pipeline_performance(texto_nfse_norm):
     """
     ✅ Pipeline deve processar 10 documentos em < 5 segundos.
     Valida performance para produção.
     """
     
-    texto_norm = normalize_text(texto_nfse_completo)
-    result = extract_from_text(texto_norm)
+    inicio = time.perf_counter_ns()
+    for _ in range(10):
+        result = extract_from_text(texto_nfse_norm)
+        assert isinstance(result, InvoiceExtractionResult)
+    duracao_sec = (time.perf_counter_ns() - inicio) / 1e9
     
-    # Se rodar 10x em < 5s, significa ~500ms por documento (OK)
-    assert isinstance(result, InvoiceExtractionResult)
\ No newline at end of file
+    # 10 documentos em < 5s equivale a ~500ms por documento (OK)
+    assert duracao_sec < 5.0
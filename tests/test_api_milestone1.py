@@ -1,15 +1,33 @@
 """
 Tests for API endpoints (Milestone 1).
 """
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from api.main import app
-
-client = TestClient(app)
+from rpa_config import settings
 
 pytestmark = pytest.mark.api
 
-def test_health_check():
+# Minimal valid single-page PDF, shared by every upload test
+_PDF_BYTES = b"%PDF-1.4\n%\xE2\xE3\xCF\xD3\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n2 0 obj\n<<\n/Type /Pages\n/Kids [3 0 R]\n/Count 1\n>>\nendobj\n3 0 obj\n<<\n/Type /Page\n/Parent 2 0 R\n/Resources <<\n/Font <<\n/F1 4 0 R\n>>\n>>\n/MediaBox [0 0 612 792]\n/Contents 5 0 R\n>>\nendobj\n4 0 obj\n<<\n/Type /Font\n/Subtype /Type1\n/BaseFont /Helvetica\n>>\nendobj\n5 0 obj\n<<\n/Length 44\n>>\nstream\nBT\n/F1 12 Tf\n100 700 Td\n(Test) Tj\nET\nendstream\nendobj\nxref\n0 6\n0000000000 65535 f\n0000000015 00000 n\n0000000068 00000 n\n0000000125 00000 n\n0000000281 00000 n\n0000000364 00000 n\ntrailer\n<<\n/Size 6\n/Root 1 0 R\n>>\nstartxref\n456\n%%EOF"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient per session; the context manager runs app startup/shutdown once."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def pdf_file():
+    """Multipart `files` payload carrying the shared PDF."""
+    return {"file": ("test.pdf", _PDF_BYTES, "application/pdf")}
+
+
+def test_health_check(client):
     """Test health endpoint returns 200 and correct structure."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -21,11 +39,8 @@ def test_health_check():
     assert data["checks"]["api"] is True
 
 
-def test_process_pdf_valid_request(tmp_path):
+def test_process_pdf_valid_request(client, pdf_file):
     """Test PDF processing endpoint with valid request."""
-    # Create a minimal valid PDF
-    pdf_content = b"%PDF-1.4\n%\xE2\xE3\xCF\xD3\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n2 0 obj\n<<\n/Type /Pages\n/Kids [3 0 R]\n/Count 1\n>>\nendobj\n3 0 obj\n<<\n/Type /Page\n/Parent 2 0 R\n/Resources <<\n/Font <<\n/F1 4 0 R\n>>\n>>\n/MediaBox [0 0 612 792]\n/Contents 5 0 R\n>>\nendobj\n4 0 obj\n<<\n/Type /Font\n/Subtype /Type1\n/BaseFont /Helvetica\n>>\nendobj\n5 0 obj\n<<\n/Length 44\n>>\nstream\nBT\n/F1 12 Tf\n100 700 Td\n(Test) Tj\nET\nendstream\nendobj\nxref\n0 6\n0000000000 65535 f\n0000000015 00000 n\n0000000068 00000 n\n0000000125 00000 n\n0000000281 00000 n\n0000000364 00000 n\ntrailer\n<<\n/Size 6\n/Root 1 0 R\n>>\nstartxref\n456\n%%EOF"
-    
     # Create test context
     context = {
         "tenant_id": "test-tenant",
@@ -34,8 +49,8 @@ def test_process_pdf_valid_request(tmp_path):
     
     response = client.post(
         "/v1/process/pdf",
-        files={"file": ("test.pdf", pdf_content, "application/pdf")},
-        data={"context": str(context).replace("'", '"')}
+        files=pdf_file,
+        data={"context": json.dumps(context)}
     )
     
     assert response.status_code == 202
@@ -45,7 +60,7 @@ def test_process_pdf_valid_request(tmp_path):
     assert data["execution_id"].startswith("test-tenant_")
 
 
-def test_process_pdf_invalid_content_type():
+def test_process_pdf_invalid_content_type(client):
     """Test PDF endpoint rejects non-PDF files."""
     response = client.post(
         "/v1/process/pdf",
@@ -56,27 +71,74 @@ def test_process_pdf_invalid_content_type():
     assert response.status_code == 415
 
 
-def test_process_pdf_invalid_context():
+def test_process_pdf_invalid_context(client, pdf_file):
     """Test PDF endpoint rejects invalid context."""
-    pdf_content = b"%PDF-1.4\ntest"
-    
     response = client.post(
         "/v1/process/pdf",
-        files={"file": ("test.pdf", pdf_content, "application/pdf")},
+        files=pdf_file,
         data={"context": "invalid json"}
     )
     
     assert response.status_code == 422
 
 
-def test_process_pdf_missing_tenant_id():
+def test_process_pdf_missing_tenant_id(client, pdf_file):
     """Test PDF endpoint requires tenant_id."""
-    pdf_content = b"%PDF-1.4\ntest"
-    
     response = client.post(
         "/v1/process/pdf",
-        files={"file": ("test.pdf", pdf_content, "application/pdf")},
+        files=pdf_file,
         data={"context": '{"pipeline":"enterprise"}'}
     )
     
     assert response.status_code == 422
+
+
+def test_process_pdf_invalid_magic_number(client):
+    """Test PDF endpoint rejects files without the %PDF header."""
+    response = client.post(
+        "/v1/process/pdf",
+        files={"file": ("test.pdf", b"not really a pdf", "application/pdf")},
+        data={"context": '{"tenant_id":"test"}'}
+    )
+    
+    assert response.status_code == 422
+
+
+def test_process_pdf_requires_full_pdf_signature(client):
+    """Test PDF endpoint requires the full %PDF- signature, the same one the orchestrator enforces."""
+    response = client.post(
+        "/v1/process/pdf",
+        files={"file": ("test.pdf", b"%PDFX not a pdf", "application/pdf")},
+        data={"context": '{"tenant_id":"test"}'}
+    )
+    
+    assert response.status_code == 422
+
+
+def test_process_pdf_file_too_large(client):
+    """Test PDF endpoint stops reading and returns 413 once the upload passes the size limit."""
+    oversized = _PDF_BYTES + b"\0" * settings.max_upload_size_bytes
+    response = client.post(
+        "/v1/process/pdf",
+        files={"file": ("big.pdf", oversized, "application/pdf")},
+        data={"context": '{"tenant_id":"test"}'}
+    )
+    
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("tenant_id,expected_status", [
+    ("são-paulo", 202),
+    ("tenant_01", 202),
+    ("-_-", 422),
+    ("tenant/01", 422),
+])
+def test_process_pdf_tenant_id_charset(client, pdf_file, tenant_id, expected_status):
+    """Test tenant_id accepts Unicode alphanumerics, dash and underscore only."""
+    response = client.post(
+        "/v1/process/pdf",
+        files=pdf_file,
+        data={"context": json.dumps({"tenant_id": tenant_id})}
+    )
+    
+    assert response.status_code == expected_status
@@ -24,4 +24,22 @@ def test_text_normalize_macro_cleneup_and_stability():
 
     assert normalized.count("ABC TECNOLOGIA LTDA") == 1
 
-    assert "400" in normalized
\ No newline at end of file
+    assert "400" in normalized
+
+@pytest.mark.normalization
+def test_text_normalize_whitespace_and_date_spacing():
+    raw = (
+        "EMISSÃO:\t\t15/12/2024 10:30:00\n"
+        "\n\n\n"
+        "VALOR  TOTAL  R$ 1 . 234 , 56\n"
+    )
+
+    normalized = normalize_text(raw)
+
+    assert normalized == "EMISSÃO: 15/12/2024 10:30:00\nVALOR TOTAL R$ 1234,56"
+
+@pytest.mark.normalization
+def test_text_normalize_remove_bom_and_word_joiner():
+    raw = "\ufeffNOTA\u2060 FISCAL\nTOMADOR\ufeff DE SERVIÇO\n"
+
+    assert normalize_text(raw) == "NOTA FISCAL\nTOMADOR DE SERVIÇO"
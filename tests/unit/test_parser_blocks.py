@@ -102,3 +102,21 @@ def test_full_extraction_orchestration():
     assert result.recipient.name == "CLIENTE TOP"
     assert len(result.items) == 1
     assert result.financials.total == "R$ 500,00"
+
+def test_extract_party_cnpj_word_boundary_is_unicode():
+    """CNPJ colado em letra acentuada não tem fronteira de palavra: não é extraído."""
+    assert extract_party_from_block("EMPRESA TESTE LTDA\nCNPJ Nº04.252.011/0001-10").cnpj_cpf is None
+    assert extract_party_from_block("EMPRESA TESTE LTDA\nCNPJ 04.252.011/0001-10").cnpj_cpf == "04.252.011/0001-10"
+
+def test_extract_party_skips_line_that_is_only_a_cnpj():
+    """Linha cujos dígitos formam um CNPJ válido é metadado, mesmo com o CNPJ colado em letras."""
+    for linha_cnpj in ("CNPJ04252011000110", "Nº04.252.011/0001-10", "04.252.011/0001-10"):
+        party = extract_party_from_block(f"PRESTADOR DE SERVIÇOS\n{linha_cnpj}\nEMPRESA ABC LTDA")
+        assert party.name == "EMPRESA ABC LTDA"
+
+def test_extract_party_keeps_name_line_with_cnpj_and_other_digits():
+    """Linha com nome, CNPJ e outros dígitos não é só um CNPJ: continua candidata a nome."""
+    party = extract_party_from_block("PRESTADOR DE SERVIÇOS\nEMPRESA ABC LTDA CNPJ 04.252.011/0001-10 IM 12345")
+
+    assert party.name == "EMPRESA ABC LTDA CNPJ 04.252.011/0001-10 IM 12345"
+    assert party.cnpj_cpf == "04.252.011/0001-10"
@@ -64,6 +64,15 @@ def test_cnpj_valid_example():
     assert result["tipo"] in {"matriz", "filial"}
     assert result["confianca"] == 95
 
+@pytest.mark.validation
+def test_cnpj_cache_retorna_copias_independentes():
+    cnpj = "04.252.011/0001-10"
+
+    primeiro = cnpj_validator(cnpj)
+    primeiro["valido"] = False  ## mutação do chamador não pode contaminar o cache
+
+    assert cnpj_validator(cnpj)["valido"] is True
+
 @pytest.mark.validation
 @pytest.mark.parametrize(
     "cnpj_input",